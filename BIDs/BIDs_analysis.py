@@ -1,12 +1,23 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import pandas as pd
 import plotly.graph_objects as go
-import os
-
-# Create plots directory if it doesn't exist
-if not os.path.exists('plots'):
-    os.makedirs('plots')
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+from plotly.utils import PlotlyJSONEncoder
+from bid_aggregates import ExpenseCube
+from trends_data import (load_trends_data, load_bid_table, metric_label, memory_report,
+                         NAME, CATEGORY, NUMBER, POINT_METRICS_CSV, GEOMETRY_METRICS_CSV)
+from run_report import RunReport, add_report_arguments
+from validation import validate_trends_csv, stop_on_problems
 
 # Constants
+FY20_CSV = 'BIDs/FY20_BID_Trends_Report_Data_20250110.csv'
+
 FINANCIAL_COLUMNS = [
     'Sanitation expenses',
     'Marketing, holiday lighting, and special event expenses',
@@ -22,6 +33,15 @@ FINANCIAL_COLUMNS = [
     'Other G&A expenses'
 ]
 
+# Trends Report columns the plots read; the rest of the report is never loaded
+FY20_SCHEMA = {
+    'BID Name:': NAME,
+    'Borough': CATEGORY,
+    'Total expenses': NUMBER,
+    'Service Area (Linear Feet)': NUMBER,
+    **{column: NUMBER for column in FINANCIAL_COLUMNS},
+}
+
 # Borough color mapping
 BOROUGH_COLORS = {
     'MN': '#1f77b4',  # Manhattan - blue
@@ -31,21 +51,56 @@ BOROUGH_COLORS = {
     'SI': '#9467bd'   # Staten Island - purple
 }
 
-# Load and validate data
-bid_data = pd.read_csv('BIDs/FY20_BID_Trends_Report_Data_20250110.csv')
-bid_data['Total_Financial'] = bid_data[FINANCIAL_COLUMNS].sum(axis=1)
+# Layout template used by every figure
+PLOT_TEMPLATE = 'plotly_white'
+
+# Plot config shared by the HTML pages and the JSON payloads
+PLOT_CONFIG = {
+    'responsive': True,
+    'displayModeBar': True,
+    'displaylogo': False,
+    'modeBarButtonsToRemove': ['lasso2d', 'select2d']
+}
+
+# Prefix of the bid_data columns joined from point datasets (point_join.py)
+POINT_METRIC_PREFIX = 'Point metric: '
+
+# Consistent color scheme for expense categories
+EXPENSE_COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', 
+                 '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf',
+                 '#aec7e8', '#ffbb78']
+
+def validate_dataset(fy20_csv=FY20_CSV):
+    """Return the problems in the FY20 data, including expense categories that do not add up to the total"""
+    return validate_trends_csv(fy20_csv, FY20_SCHEMA, FINANCIAL_COLUMNS, 'Total expenses')
 
-# Validate totals
-mismatch_mask = abs(bid_data['Total_Financial'] - bid_data['Total expenses']) > 10
-if mismatch_mask.any():
-    mismatched_rows = bid_data[mismatch_mask]
-    print("\nMismatched values:")
-    for idx, row in mismatched_rows.iterrows():
-        print(f"BID: {row['BID Name:']} | Difference: ${row['Total_Financial'] - row['Total expenses']:,.2f}")
-    raise ValueError('Total financial differs from total expenses by more than $10')
+def load_dataset(fy20_csv=FY20_CSV, geometry_metrics_csv=GEOMETRY_METRICS_CSV):
+    """Load the FY20 data (checked by validate_dataset) and precompute what the figures share"""
+    bid_data = load_trends_data(fy20_csv, FY20_SCHEMA)
 
-# Calculate metrics
-bid_data['Expense_per_linear_foot'] = bid_data['Total expenses'] / bid_data['Service Area (Linear Feet)']
+    # Measured boundary size and founding year, from the table written by BIDs_map.py
+    geometry_table = load_bid_table(geometry_metrics_csv, key='fy20_name')
+    geometry_columns = ['area_sqft', 'perimeter_ft', 'year_found']
+    if geometry_table is None:
+        geometry_table = pd.DataFrame(columns=geometry_columns, dtype=float)
+    geometry_table = geometry_table.reindex(columns=geometry_columns)
+
+    cube = ExpenseCube(bid_data, FINANCIAL_COLUMNS, founding_years=geometry_table['year_found'])
+    bid_data['Total_Financial'] = cube.total.values
+
+    # Calculate metrics
+    bid_data['Expense_per_linear_foot'] = bid_data['Total expenses'] / bid_data['Service Area (Linear Feet)']
+
+    bid_data = bid_data.join(geometry_table, on='BID Name:')
+    bid_data['Expense_per_square_foot'] = bid_data['Total expenses'] / bid_data['area_sqft']
+    bid_data['Expense_per_perimeter_foot'] = bid_data['Total expenses'] / bid_data['perimeter_ft']
+
+    # Add the metrics joined from point datasets, if there are any
+    point_metrics = load_bid_table(POINT_METRICS_CSV, key='fy20_name')
+    if point_metrics is not None:
+        point_metrics = point_metrics.rename(columns=lambda column: POINT_METRIC_PREFIX + metric_label(column))
+        bid_data = bid_data.join(point_metrics, on='BID Name:')
+    return bid_data, cube
 
 def create_responsive_layout(fig, title, xaxis_title, yaxis_title):
     """Helper function to create responsive layouts"""
@@ -66,7 +121,7 @@ def create_responsive_layout(fig, title, xaxis_title, yaxis_title):
             xanchor="left",
             x=1.01
         ),
-        template="plotly_white",
+        template=PLOT_TEMPLATE,
         height=800  # Set a default height
     )
 
@@ -75,17 +130,10 @@ def save_responsive_plot(fig, filename):
     with open('plots/template.html', 'r') as template_file:
         template = template_file.read()
     
-    config = {
-        'responsive': True,
-        'displayModeBar': True,
-        'displaylogo': False,
-        'modeBarButtonsToRemove': ['lasso2d', 'select2d']
-    }
-    
     plot_html = fig.to_html(
         full_html=False,
         include_plotlyjs=False,
-        config=config
+        config=PLOT_CONFIG
     )
     
     final_html = template.replace('<!-- Plot will be inserted here -->', plot_html)
@@ -93,292 +141,501 @@ def save_responsive_plot(fig, filename):
     with open(f'plots/{filename}', 'w') as f:
         f.write(final_html)
 
-# Create scatter plot (Total Expenses vs Cost per Linear Foot)
-fig_scatter = go.Figure()
-
-# Add traces for each borough
-for borough in BOROUGH_COLORS:
-    borough_data = bid_data[bid_data['Borough'] == borough]
-    fig_scatter.add_trace(go.Scatter(
-        x=borough_data['Total expenses'],
-        y=borough_data['Expense_per_linear_foot'],
-        mode='markers+text',
-        text=borough_data['BID Name:'],
-        textposition='top center',
-        name=borough,
-        marker=dict(
-            size=10,
-            color=BOROUGH_COLORS[borough],
-            opacity=0.7
-        ),
-        hovertemplate="<b>%{text}</b><br>" +
-                     "Borough: " + borough + "<br>" +
-                     "Total Expenses: $%{x:,.2f}<br>" +
-                     "Cost per Linear Foot: $%{y:.2f}<br>" +
-                     "<extra></extra>"
-    ))
-
-create_responsive_layout(
-    fig_scatter,
-    "BID Total Expenses vs Cost per Linear Foot by Borough (Log Scale)",
-    "Total Expenses ($)",
-    "Cost per Linear Foot ($)"
-)
-
-fig_scatter.update_layout(
-    xaxis_type="log",
-    yaxis_type="log",
-    xaxis=dict(
-        type="log",
-        tickformat="$,.0f",
-        tickvals=[1e5, 2e5, 4e5, 7e5, 1e6, 2e6, 4e6, 7e6, 1e7, 2e7],
-        tickangle=45,
-        tickfont=dict(size=10)
+def write_if_changed(path, content):
+    """Write a text file unless it already has this content"""
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+def save_viewer_assets(template_name=PLOT_TEMPLATE):
+    """Helper function to write the local Plotly bundle and the shared layout template for plots/viewer.html"""
+    write_if_changed('plots/vendor/plotly.min.js', get_plotlyjs())
+    template = json.dumps(pio.templates[template_name].to_plotly_json(), cls=PlotlyJSONEncoder, separators=(',', ':'))
+    write_if_changed(f'plots/data/templates/{template_name}.json', template)
+
+def save_plot_data(fig, filename):
+    """Helper function to save a figure's data and layout as compact JSON for plots/viewer.html
+
+    The layout template is replaced by its name; the viewer loads it from
+    the shared file written by save_viewer_assets.
+    """
+    figure = json.loads(fig.to_json())
+    figure['layout'].pop('template', None)
+    figure['template'] = PLOT_TEMPLATE
+    figure['config'] = PLOT_CONFIG
+
+    with open(f'plots/data/{filename[:-5]}.json', 'w') as f:
+        json.dump(figure, f, separators=(',', ':'))
+
+def plot_expenses_vs_linear_foot(bid_data, cube):
+    """Scatter plot of total expenses vs cost per linear foot"""
+    # Create scatter plot (Total Expenses vs Cost per Linear Foot)
+    fig_scatter = go.Figure()
+
+    # Point dataset metrics are listed in the hover labels
+    point_columns = [column for column in bid_data.columns if column.startswith(POINT_METRIC_PREFIX)]
+    point_hover = ''.join(
+        f"{column[len(POINT_METRIC_PREFIX):]}: %{{customdata[{i}]:,.0f}}<br>"
+        for i, column in enumerate(point_columns)
     )
-)
-
-fig_scatter.update_yaxes(tickformat="$,.2f")
-save_responsive_plot(fig_scatter, "bid_expenses_vs_linear_foot.html")
-
-# Create regular histogram of cost per linear foot
-fig_hist_linear = go.Figure()
-
-# Create histogram trace for each borough
-for borough in BOROUGH_COLORS:
-    borough_data = bid_data[bid_data['Borough'] == borough]
-    fig_hist_linear.add_trace(go.Histogram(
-        x=borough_data['Expense_per_linear_foot'],
-        nbinsx=20,
-        name=borough,
-        marker_color=BOROUGH_COLORS[borough],
-        hovertemplate=f"Borough: {borough}<br>Range: $%{{x:.2f}}<br>Count: %{{y}}<extra></extra>"
-    ))
-
-create_responsive_layout(
-    fig_hist_linear,
-    "Distribution of Cost per Linear Foot by Borough",
-    "Cost per Linear Foot ($)",
-    "Number of BIDs"
-)
-
-fig_hist_linear.update_layout(
-    bargap=0.1,
-    barmode='stack'
-)
-
-fig_hist_linear.update_xaxes(tickformat="$,.2f")
-save_responsive_plot(fig_hist_linear, "cost_per_foot_distribution.html")
-
-# Create detailed histogram with $25 bins up to $625
-fig_hist_detailed = go.Figure()
-
-# Create detailed histogram trace for each borough
-for borough in BOROUGH_COLORS:
-    borough_data = bid_data[bid_data['Borough'] == borough]
-    fig_hist_detailed.add_trace(go.Histogram(
-        x=borough_data['Expense_per_linear_foot'],
-        xbins=dict(
-            start=0,
-            end=625,
-            size=25
-        ),
-        name=borough,
-        marker_color=BOROUGH_COLORS[borough],
-        hovertemplate=f"Borough: {borough}<br>Range: $%{{x:.2f}}<br>Count: %{{y}}<extra></extra>"
-    ))
-
-create_responsive_layout(
-    fig_hist_detailed,
-    "Detailed Distribution of Cost per Linear Foot by Borough ($25 bins)",
-    "Cost per Linear Foot ($)",
-    "Number of BIDs"
-)
-
-fig_hist_detailed.update_layout(
-    bargap=0.1,
-    barmode='stack'
-)
-
-fig_hist_detailed.update_xaxes(tickformat="$,.2f")
-save_responsive_plot(fig_hist_detailed, "cost_per_foot_detailed.html")
-
-# Calculate financial percentages
-financial_percentages = pd.DataFrame()
-financial_percentages['BID Name:'] = bid_data['BID Name:']
-financial_percentages['Borough'] = bid_data['Borough']
-financial_percentages['Total_Financial'] = bid_data['Total_Financial']
-for column in FINANCIAL_COLUMNS:
-    financial_percentages[f'{column} %'] = (bid_data[column] / bid_data['Total_Financial']) * 100
-financial_percentages = financial_percentages.round(3)
-
-# Sort and prepare labels for visualization
-sorted_financial = financial_percentages.sort_values('Total_Financial', ascending=False)
-
-# Create cumulative bar chart
-fig_cumulative_all = go.Figure()
-
-# Create a consistent color scheme for expense categories
-EXPENSE_COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', 
-                 '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf',
-                 '#aec7e8', '#ffbb78']
 
-# Create the stacked bars
-for i, column in enumerate(FINANCIAL_COLUMNS):
-    fig_cumulative_all.add_trace(go.Bar(
-        x=sorted_financial['BID Name:'],
-        y=sorted_financial[f'{column} %'],
-        name=column,
-        marker=dict(color=EXPENSE_COLORS[i]),
-        hovertemplate=f"<b>%{{x}}</b><br>{column}: %{{y:.2f}}%<br><extra></extra>"
-    ))
-
-# Create x-axis labels with budget information
-x_labels = [f"{row['BID Name:']} (${int(row['Total_Financial']/1e6)}M)" if row['Total_Financial'] >= 1e6 
-           else f"{row['BID Name:']} (${int(row['Total_Financial']/1e3)}K)" 
-           for _, row in sorted_financial.iterrows()]
-
-create_responsive_layout(
-    fig_cumulative_all,
-    "Distribution of Expenses Across All BIDs",
-    "BID Name",
-    "Percentage of Total Expenses"
-)
-
-fig_cumulative_all.update_layout(
-    barmode='stack',
-    xaxis=dict(
-        ticktext=x_labels,
-        tickvals=sorted_financial['BID Name:'],
-        tickangle=45,
-        showticklabels=True
-    ),
-    yaxis=dict(range=[0, 100])
-)
-
-save_responsive_plot(fig_cumulative_all, "expense_distribution.html")
-
-# Calculate averages for comparison
-avg_percentages = pd.Series({
-    f'{col} %': financial_percentages[f'{col} %'].sum() / len(financial_percentages) 
-    for col in FINANCIAL_COLUMNS
-})
-
-# Calculate dollar weighted average percentages for all BIDs
-total_expenses_by_category = bid_data[FINANCIAL_COLUMNS].sum()
-weighted_percentages = (total_expenses_by_category / total_expenses_by_category.sum()) * 100
-
-# Get top 5 and bottom 25 BIDs by total financial
-top_5_bids = bid_data.nlargest(5, 'Total_Financial')
-bottom_25_bids = bid_data.nsmallest(25, 'Total_Financial')
-
-# Calculate weighted averages for top 5
-top_5_expenses = top_5_bids[FINANCIAL_COLUMNS].sum()
-top_5_weighted = (top_5_expenses / top_5_expenses.sum()) * 100
-
-# Calculate weighted averages for bottom 25
-bottom_25_expenses = bottom_25_bids[FINANCIAL_COLUMNS].sum()
-bottom_25_weighted = (bottom_25_expenses / bottom_25_expenses.sum()) * 100
-
-# Create a stacked bar chart comparing all averages
-fig_averages = go.Figure()
-
-# Add bars for each expense category across all average types
-for i, column in enumerate(FINANCIAL_COLUMNS):
-    fig_averages.add_trace(go.Bar(
-        x=['Simple Average (All BIDs)', 'Dollar Weighted Average (All BIDs)', 
-           'Dollar Weighted Average (Top 5)', 'Dollar Weighted Average (Bottom 25)'],
-        y=[avg_percentages[f'{column} %'], weighted_percentages[i], 
-           top_5_weighted[i], bottom_25_weighted[i]],
-        name=column,
-        marker=dict(color=EXPENSE_COLORS[i]),
-        hovertemplate=f"<b>{column}</b><br>%{{y:.2f}}%<br><extra></extra>"
-    ))
-
-create_responsive_layout(
-    fig_averages,
-    "Comparison of Average Expense Distributions",
-    "Average Type",
-    "Percentage"
-)
-
-fig_averages.update_layout(
-    barmode='stack',
-    xaxis=dict(tickangle=45)
-)
-
-save_responsive_plot(fig_averages, "expense_averages.html")
-
-# Create histogram with 100k bins
-fig_hist_100k = go.Figure()
-
-# Add traces for each borough with 100k bins
-for borough in BOROUGH_COLORS:
-    borough_data = bid_data[bid_data['Borough'] == borough]
-    fig_hist_100k.add_trace(go.Histogram(
-        x=borough_data['Total_Financial'],
-        xbins=dict(
-            start=0,
-            end=5200000,
-            size=100000
-        ),
-        name=borough,
-        marker_color=BOROUGH_COLORS[borough],
-        hovertemplate=f"Borough: {borough}<br>Range: $%{{x:,.0f}}<br>Count: %{{y}}<extra></extra>"
-    ))
-
-create_responsive_layout(
-    fig_hist_100k,
-    "Distribution of BID Total Expenses by Borough (100k bins)",
-    "Total Expenses ($)",
-    "Number of BIDs"
-)
-
-fig_hist_100k.update_layout(
-    bargap=0.1,
-    barmode='stack'
-)
-
-fig_hist_100k.update_xaxes(tickformat="$,.0f")
-save_responsive_plot(fig_hist_100k, "total_expenses_100k.html")
-
-# Create histogram with 1M bins
-max_value = bid_data['Total_Financial'].max()
-fig_hist_1m = go.Figure()
-
-# Add traces for each borough with 1M bins
-for borough in BOROUGH_COLORS:
-    borough_data = bid_data[bid_data['Borough'] == borough]
-    fig_hist_1m.add_trace(go.Histogram(
-        x=borough_data['Total_Financial'],
-        xbins=dict(
-            start=0,
-            end=max_value,
-            size=1000000
+    # Add traces for each borough
+    for borough in BOROUGH_COLORS:
+        borough_data = bid_data[bid_data['Borough'] == borough]
+        fig_scatter.add_trace(go.Scatter(
+            x=borough_data['Total expenses'],
+            y=borough_data['Expense_per_linear_foot'],
+            mode='markers+text',
+            text=borough_data['BID Name:'],
+            textposition='top center',
+            name=borough,
+            marker=dict(
+                size=10,
+                color=BOROUGH_COLORS[borough],
+                opacity=0.7
+            ),
+            hovertemplate="<b>%{text}</b><br>" +
+                         "Borough: " + borough + "<br>" +
+                         "Total Expenses: $%{x:,.2f}<br>" +
+                         "Cost per Linear Foot: $%{y:.2f}<br>" +
+                         point_hover +
+                         "<extra></extra>",
+            customdata=borough_data[point_columns] if point_columns else None
+        ))
+
+    create_responsive_layout(
+        fig_scatter,
+        "BID Total Expenses vs Cost per Linear Foot by Borough (Log Scale)",
+        "Total Expenses ($)",
+        "Cost per Linear Foot ($)"
+    )
+
+    fig_scatter.update_layout(
+        xaxis_type="log",
+        yaxis_type="log",
+        xaxis=dict(
+            type="log",
+            tickformat="$,.0f",
+            tickvals=[1e5, 2e5, 4e5, 7e5, 1e6, 2e6, 4e6, 7e6, 1e7, 2e7],
+            tickangle=45,
+            tickfont=dict(size=10)
+        )
+    )
+
+    fig_scatter.update_yaxes(tickformat="$,.2f")
+    return fig_scatter
+
+def plot_cost_per_foot_distribution(bid_data, cube):
+    """Histogram of cost per linear foot"""
+    # Create regular histogram of cost per linear foot
+    fig_hist_linear = go.Figure()
+
+    # Create histogram trace for each borough
+    for borough in BOROUGH_COLORS:
+        borough_data = bid_data[bid_data['Borough'] == borough]
+        fig_hist_linear.add_trace(go.Histogram(
+            x=borough_data['Expense_per_linear_foot'],
+            nbinsx=20,
+            name=borough,
+            marker_color=BOROUGH_COLORS[borough],
+            hovertemplate=f"Borough: {borough}<br>Range: $%{{x:.2f}}<br>Count: %{{y}}<extra></extra>"
+        ))
+
+    create_responsive_layout(
+        fig_hist_linear,
+        "Distribution of Cost per Linear Foot by Borough",
+        "Cost per Linear Foot ($)",
+        "Number of BIDs"
+    )
+
+    fig_hist_linear.update_layout(
+        bargap=0.1,
+        barmode='stack'
+    )
+
+    fig_hist_linear.update_xaxes(tickformat="$,.2f")
+    return fig_hist_linear
+
+def plot_cost_per_foot_detailed(bid_data, cube):
+    """Histogram of cost per linear foot with $25 bins"""
+    # Create detailed histogram with $25 bins up to $625
+    fig_hist_detailed = go.Figure()
+
+    # Create detailed histogram trace for each borough
+    for borough in BOROUGH_COLORS:
+        borough_data = bid_data[bid_data['Borough'] == borough]
+        fig_hist_detailed.add_trace(go.Histogram(
+            x=borough_data['Expense_per_linear_foot'],
+            xbins=dict(
+                start=0,
+                end=625,
+                size=25
+            ),
+            name=borough,
+            marker_color=BOROUGH_COLORS[borough],
+            hovertemplate=f"Borough: {borough}<br>Range: $%{{x:.2f}}<br>Count: %{{y}}<extra></extra>"
+        ))
+
+    create_responsive_layout(
+        fig_hist_detailed,
+        "Detailed Distribution of Cost per Linear Foot by Borough ($25 bins)",
+        "Cost per Linear Foot ($)",
+        "Number of BIDs"
+    )
+
+    fig_hist_detailed.update_layout(
+        bargap=0.1,
+        barmode='stack'
+    )
+
+    fig_hist_detailed.update_xaxes(tickformat="$,.2f")
+    return fig_hist_detailed
+
+def plot_expense_distribution(bid_data, cube):
+    """Stacked bars of each BID's expense categories"""
+    # Sort and prepare labels for visualization
+    sorted_totals = cube.total.sort_values(ascending=False)
+    sorted_shares = cube.shares.loc[sorted_totals.index].round(3)
+
+    # Create cumulative bar chart
+    fig_cumulative_all = go.Figure()
+
+    # Create the stacked bars
+    for i, column in enumerate(FINANCIAL_COLUMNS):
+        fig_cumulative_all.add_trace(go.Bar(
+            x=sorted_shares.index,
+            y=sorted_shares[column],
+            name=column,
+            marker=dict(color=EXPENSE_COLORS[i]),
+            hovertemplate=f"<b>%{{x}}</b><br>{column}: %{{y:.2f}}%<br><extra></extra>"
+        ))
+
+    # Create x-axis labels with budget information
+    x_labels = [f"{name} (${int(total/1e6)}M)" if total >= 1e6
+               else f"{name} (${int(total/1e3)}K)"
+               for name, total in sorted_totals.items()]
+
+    create_responsive_layout(
+        fig_cumulative_all,
+        "Distribution of Expenses Across All BIDs",
+        "BID Name",
+        "Percentage of Total Expenses"
+    )
+
+    fig_cumulative_all.update_layout(
+        barmode='stack',
+        xaxis=dict(
+            ticktext=x_labels,
+            tickvals=sorted_shares.index,
+            tickangle=45,
+            showticklabels=True
         ),
-        name=borough,
-        marker_color=BOROUGH_COLORS[borough],
-        hovertemplate=f"Borough: {borough}<br>Range: $%{{x:,.0f}}<br>Count: %{{y}}<extra></extra>"
-    ))
+        yaxis=dict(range=[0, 100])
+    )
 
-create_responsive_layout(
-    fig_hist_1m,
-    "Distribution of BID Total Expenses by Borough (1M bins)",
-    "Total Expenses ($)",
-    "Number of BIDs"
-)
+    return fig_cumulative_all
+
+def plot_expense_averages(bid_data, cube):
+    """Stacked bars comparing average expense distributions"""
+    # Expense shares for each comparison, one column per average type
+    averages = pd.DataFrame({
+        'Simple Average (All BIDs)': cube.simple_shares(),
+        'Dollar Weighted Average (All BIDs)': cube.weighted_shares(),
+        'Dollar Weighted Average (Top 5)': cube.weighted_shares(cube.top(5)),
+        'Dollar Weighted Average (Bottom 25)': cube.weighted_shares(cube.bottom(25)),
+    })
+
+    # Create a stacked bar chart comparing all averages
+    fig_averages = go.Figure()
+
+    # Add bars for each expense category across all average types
+    for i, column in enumerate(FINANCIAL_COLUMNS):
+        fig_averages.add_trace(go.Bar(
+            x=list(averages.columns),
+            y=averages.loc[column].tolist(),
+            name=column,
+            marker=dict(color=EXPENSE_COLORS[i]),
+            hovertemplate=f"<b>{column}</b><br>%{{y:.2f}}%<br><extra></extra>"
+        ))
+
+    create_responsive_layout(
+        fig_averages,
+        "Comparison of Average Expense Distributions",
+        "Average Type",
+        "Percentage"
+    )
 
-fig_hist_1m.update_layout(
-    bargap=0.1,
-    barmode='stack'
-)
+    fig_averages.update_layout(
+        barmode='stack',
+        xaxis=dict(tickangle=45)
+    )
 
-fig_hist_1m.update_xaxes(tickformat="$,.0f")
-save_responsive_plot(fig_hist_1m, "total_expenses_1m.html")
+    return fig_averages
+
+def plot_expense_by_founding_decade(bid_data, cube):
+    """Stacked bars of dollar-weighted expense shares for the BIDs founded in each decade"""
+    shares = cube.rollup('founding_decade')
+    labels = [f"{decade}s (n={len(cube.where(founding_decade=decade))})" for decade in shares.index]
+
+    fig_decades = go.Figure()
+
+    # Add bars for each expense category across all decades
+    for i, column in enumerate(FINANCIAL_COLUMNS):
+        fig_decades.add_trace(go.Bar(
+            x=labels,
+            y=shares[column].tolist(),
+            name=column,
+            marker=dict(color=EXPENSE_COLORS[i]),
+            hovertemplate=f"<b>{column}</b><br>%{{y:.2f}}%<br><extra></extra>"
+        ))
+
+    create_responsive_layout(
+        fig_decades,
+        "Dollar Weighted Expense Distribution by Founding Decade",
+        "Founding Decade",
+        "Percentage"
+    )
 
-print("All plots have been generated with responsive design!")
+    fig_decades.update_layout(barmode='stack')
+
+    return fig_decades
+
+def plot_total_expenses_100k(bid_data, cube):
+    """Histogram of total expenses with 100k bins"""
+    # Create histogram with 100k bins
+    fig_hist_100k = go.Figure()
+
+    # Add traces for each borough with 100k bins
+    for borough in BOROUGH_COLORS:
+        borough_data = bid_data[bid_data['Borough'] == borough]
+        fig_hist_100k.add_trace(go.Histogram(
+            x=borough_data['Total_Financial'],
+            xbins=dict(
+                start=0,
+                end=5200000,
+                size=100000
+            ),
+            name=borough,
+            marker_color=BOROUGH_COLORS[borough],
+            hovertemplate=f"Borough: {borough}<br>Range: $%{{x:,.0f}}<br>Count: %{{y}}<extra></extra>"
+        ))
+
+    create_responsive_layout(
+        fig_hist_100k,
+        "Distribution of BID Total Expenses by Borough (100k bins)",
+        "Total Expenses ($)",
+        "Number of BIDs"
+    )
 
+    fig_hist_100k.update_layout(
+        bargap=0.1,
+        barmode='stack'
+    )
 
+    fig_hist_100k.update_xaxes(tickformat="$,.0f")
+    return fig_hist_100k
+
+def plot_total_expenses_1m(bid_data, cube):
+    """Histogram of total expenses with 1M bins"""
+    # Create histogram with 1M bins
+    max_value = bid_data['Total_Financial'].max()
+    fig_hist_1m = go.Figure()
+
+    # Add traces for each borough with 1M bins
+    for borough in BOROUGH_COLORS:
+        borough_data = bid_data[bid_data['Borough'] == borough]
+        fig_hist_1m.add_trace(go.Histogram(
+            x=borough_data['Total_Financial'],
+            xbins=dict(
+                start=0,
+                end=max_value,
+                size=1000000
+            ),
+            name=borough,
+            marker_color=BOROUGH_COLORS[borough],
+            hovertemplate=f"Borough: {borough}<br>Range: $%{{x:,.0f}}<br>Count: %{{y}}<extra></extra>"
+        ))
+
+    create_responsive_layout(
+        fig_hist_1m,
+        "Distribution of BID Total Expenses by Borough (1M bins)",
+        "Total Expenses ($)",
+        "Number of BIDs"
+    )
 
+    fig_hist_1m.update_layout(
+        bargap=0.1,
+        barmode='stack'
+    )
 
+    fig_hist_1m.update_xaxes(tickformat="$,.0f")
+    return fig_hist_1m
+
+def plot_cost_per_square_foot(bid_data, cube):
+    """Histogram of cost per square foot of mapped BID area"""
+    fig_hist_area = go.Figure()
+
+    # Create histogram trace for each borough
+    for borough in BOROUGH_COLORS:
+        borough_data = bid_data[bid_data['Borough'] == borough]
+        fig_hist_area.add_trace(go.Histogram(
+            x=borough_data['Expense_per_square_foot'],
+            nbinsx=20,
+            name=borough,
+            marker_color=BOROUGH_COLORS[borough],
+            hovertemplate=f"Borough: {borough}<br>Range: $%{{x:.2f}}<br>Count: %{{y}}<extra></extra>"
+        ))
+
+    create_responsive_layout(
+        fig_hist_area,
+        "Distribution of Cost per Square Foot of BID Area by Borough",
+        "Cost per Square Foot ($)",
+        "Number of BIDs"
+    )
 
+    fig_hist_area.update_layout(
+        bargap=0.1,
+        barmode='stack'
+    )
+
+    fig_hist_area.update_xaxes(tickformat="$,.2f")
+    return fig_hist_area
+
+def plot_cost_per_perimeter_foot(bid_data, cube):
+    """Scatter plot of reported cost per linear foot vs cost per foot of mapped perimeter"""
+    fig_perimeter = go.Figure()
+
+    # Add traces for each borough
+    for borough in BOROUGH_COLORS:
+        borough_data = bid_data[bid_data['Borough'] == borough]
+        fig_perimeter.add_trace(go.Scatter(
+            x=borough_data['Expense_per_linear_foot'],
+            y=borough_data['Expense_per_perimeter_foot'],
+            mode='markers',
+            text=borough_data['BID Name:'],
+            name=borough,
+            marker=dict(
+                size=10,
+                color=BOROUGH_COLORS[borough],
+                opacity=0.7
+            ),
+            hovertemplate="<b>%{text}</b><br>" +
+                         "Borough: " + borough + "<br>" +
+                         "Cost per Linear Foot (reported): $%{x:.2f}<br>" +
+                         "Cost per Perimeter Foot (mapped): $%{y:.2f}<br>" +
+                         "<extra></extra>"
+        ))
+
+    create_responsive_layout(
+        fig_perimeter,
+        "Cost per Reported Linear Foot vs Cost per Foot of Mapped Perimeter (Log Scale)",
+        "Cost per Linear Foot, Reported Service Area ($)",
+        "Cost per Foot of Mapped Boundary Perimeter ($)"
+    )
+
+    fig_perimeter.update_layout(
+        xaxis_type="log",
+        yaxis_type="log"
+    )
+
+    fig_perimeter.update_xaxes(tickformat="$,.0f")
+    fig_perimeter.update_yaxes(tickformat="$,.0f")
+    return fig_perimeter
+
+# Output file for each figure
+FIGURES = {
+    'bid_expenses_vs_linear_foot.html': plot_expenses_vs_linear_foot,
+    'cost_per_foot_distribution.html': plot_cost_per_foot_distribution,
+    'cost_per_foot_detailed.html': plot_cost_per_foot_detailed,
+    'expense_distribution.html': plot_expense_distribution,
+    'expense_averages.html': plot_expense_averages,
+    'expense_by_founding_decade.html': plot_expense_by_founding_decade,
+    'total_expenses_100k.html': plot_total_expenses_100k,
+    'total_expenses_1m.html': plot_total_expenses_1m,
+    'cost_per_square_foot.html': plot_cost_per_square_foot,
+    'cost_per_perimeter_foot.html': plot_cost_per_perimeter_foot,
+}
 
+# Dataset shared by the figures in a worker process
+shared_dataset = None
+
+def init_worker(dataset):
+    global shared_dataset
+    shared_dataset = dataset
+
+def render_figure(filename, output='html'):
+    """Build and save one figure from the shared dataset, returning its timings in seconds"""
+    start = time.perf_counter()
+    fig = FIGURES[filename](*shared_dataset)
+    built = time.perf_counter()
+    if output == 'json':
+        save_plot_data(fig, filename)
+    else:
+        save_responsive_plot(fig, filename)
+    saved = time.perf_counter()
+    return filename, built - start, saved - built
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate the NYC BIDs analysis plots')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Render figures in this many worker processes (0 = one per CPU, 1 = no pool)')
+    parser.add_argument('--output', choices=['html', 'json'], default='html',
+                        help='Write standalone HTML pages, or JSON payloads for plots/viewer.html '
+                             'with a local Plotly bundle')
+    add_report_arguments(parser, 'BIDs_analysis')
+    args = parser.parse_args()
+    report = RunReport.from_args('BIDs_analysis', args)
+
+    # Stop before anything is written if the data has problems
+    report.stage('validation')
+    stop_on_problems(validate_dataset(), report, args.report)
+
+    # Create plots directory if it doesn't exist
+    if not os.path.exists('plots'):
+        os.makedirs('plots')
+    if args.output == 'json':
+        os.makedirs('plots/data', exist_ok=True)
+        save_viewer_assets()
+
+    start = time.perf_counter()
+    report.stage('load_dataset')
+    dataset = load_dataset()
+    loaded = time.perf_counter()
+    report.count('bids', len(dataset[0]))
+    report.record('fy20_memory', memory_report(dataset[0][list(FY20_SCHEMA)]))
+
+    # Figures are timed individually below; this stage covers them all,
+    # including any worker start-up. Profiling only sees this process.
+    report.stage('plot_rendering')
+
+    if args.jobs == 1:
+        init_worker(dataset)
+        timings = [render_figure(filename, args.output) for filename in FIGURES]
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs or None, initializer=init_worker,
+                                 initargs=(dataset,)) as pool:
+            timings = list(pool.map(render_figure, FIGURES, repeat(args.output)))
+    report.end_stage()
+
+    report.count('figures', len(timings))
+    report.record('figures', {
+        filename: {'build_seconds': round(build_time, 4), 'save_seconds': round(save_time, 4)}
+        for filename, build_time, save_time in timings
+    })
+    for filename in FIGURES:
+        report.add_output(os.path.join('plots', filename if args.output == 'html' else f'data/{filename[:-5]}.json'))
+
+    print(f"\nLoaded data in {loaded - start:.2f}s")
+    for filename, build_time, save_time in timings:
+        print(f"  {filename:<36} build {build_time:.2f}s  serialize+write {save_time:.2f}s")
+    print(f"Total {time.perf_counter() - start:.2f}s")
+    report.save(args.report)
+    print(f"Run report written to {args.report}")
+    print("All plots have been generated with responsive design!")
+
+if __name__ == '__main__':
+    main()
@@ -1,374 +1,388 @@
+import argparse
+import os
 import pandas as pd
 import geopandas as gpd
 import folium
 from branca.colormap import LinearColormap
-import shapely.wkt
-from fuzzywuzzy import fuzz
-import re
-
-# Read the BIDs data and FY20 data
-print("Reading data files...")
-bids_data = pd.read_csv('BIDs/NYC_BIDS_09112015_20250113.csv')
-fy20_data = pd.read_csv('BIDs/FY20_BID_Trends_Report_Data_20250110.csv')
-
-def clean_bid_name(name):
-    # Remove common variations and standardize
-    name = str(name).lower()
-    name = re.sub(r'\s+bid\b', '', name)  # Remove ' BID' at the end
-    name = re.sub(r'\bdistrict\b', '', name)  # Remove 'district'
-    name = re.sub(r'\b(business improvement|improvement)\b', '', name)  # Remove 'business improvement' or 'improvement'
-    name = re.sub(r'[^\w\s]', '', name)  # Remove special characters
-    name = re.sub(r'\s+', ' ', name)  # Normalize whitespace
-    return name.strip()
-
-# Create a mapping of cleaned BID names to their original names and expenses
-print("Creating BID name mappings...")
-expense_lookup = {}
-fy20_cleaned_names = {clean_bid_name(name): (name, expense) for name, expense in zip(fy20_data['BID Name:'], fy20_data['Total expenses'])}
-
-# Get Church Avenue and Flatbush Avenue expenses for combined value
-church_ave_expense = fy20_data[fy20_data['BID Name:'] == 'Church Avenue']['Total expenses'].iloc[0]
-flatbush_ave_expense = fy20_data[fy20_data['BID Name:'] == 'Flatbush Avenue']['Total expenses'].iloc[0]
-combined_expense = church_ave_expense + flatbush_ave_expense
-
-# Manual overrides for specific matches
-manual_matches = {
-    'Alliance for Downtown New York': 'Downtown Alliance',
-    'Myrtle Avenue': 'Myrtle Avenue (Queens)',
-    'Myrtle Avenue Brooklyn Partnership': 'Myrtle Avenue (Brooklyn)',
-    'Lower East Side': 'Lower East Side Partnership',
-    'SoHo Broadway': 'SoHo Broadway Initiative',
-    'Fulton Area Business (FAB) Alliance': 'FAB Fulton',
-}
-
-# Special cases where we need to handle the expense differently
-special_expenses = {
-    'Church Flatbush Community Alliance': combined_expense
-}
-
-def find_best_match(bid_name, threshold=60, return_details=False):
-    # Check special data cases first
-    if bid_name in special_data:
-        if return_details:
-            return special_data[bid_name], 100, "Combined Church Ave & Flatbush Ave"
-        return special_data[bid_name]['expenses']
-    
-    # Check manual matches
-    if bid_name in manual_matches:
-        matched_name = manual_matches[bid_name]
-        if matched_name in fy20_data_dict:
-            if return_details:
-                return fy20_data_dict[matched_name], 100, matched_name
-            return fy20_data_dict[matched_name]['expenses']
-
-    cleaned_name = clean_bid_name(bid_name)
-    
-    # Normal matching logic
-    if cleaned_name in fy20_cleaned_names:
-        matched_name = fy20_cleaned_names[cleaned_name][0]
-        if return_details:
-            return fy20_data_dict[matched_name], 100, matched_name
-        return fy20_data_dict[matched_name]['expenses']
-    
-    # If no exact match, try fuzzy matching
-    best_ratio = 0
-    best_match = None
-    best_original = None
-    
-    for clean_name, (original_name, _) in fy20_cleaned_names.items():
-        # Skip the incorrect West Village -> Bayside Village match
-        if bid_name == 'West Village' and original_name == 'Bayside Village':
-            continue
-            
-        ratio = fuzz.ratio(cleaned_name, clean_name)
-        if ratio > best_ratio and ratio > threshold:
-            best_ratio = ratio
-            best_match = fy20_data_dict[original_name]
-            best_original = original_name
-    
-    if return_details:
-        return best_match, best_ratio, best_original
-    return best_match['expenses'] if best_match else None
-
-# Convert WKT strings to shapely geometries
-print("Converting geometries...")
-bids_data['geometry'] = bids_data['the_geom'].apply(shapely.wkt.loads)
-
-# Convert to GeoDataFrame with correct CRS
-bids_gdf = gpd.GeoDataFrame(bids_data, geometry='geometry', crs="EPSG:4326")
-
-# Create a base map centered on NYC
-print("Creating map...")
-nyc_map = folium.Map(
-    location=[40.7128, -74.0060],
-    zoom_start=11,
-    tiles='CartoDB positron'
-)
-
-# Create a color map based on founding years with red-orange-yellow-green-blue transitions
-years = bids_gdf['Year_Found'].astype(float)
-print(f"\nYear range: {years.min()} to {years.max()}")
-
-colormap = LinearColormap(
-    colors=[
-        # Reds (10 shades)
-        '#67000d', '#800000', '#990000', '#b30000', '#cc0000', '#e60000', '#ff0000', '#ff1a1a', '#ff3333', '#ff4d4d',
-        
-        # Red-Orange transition (10 shades)
-        '#ff6600', '#ff751a', '#ff8533', '#ff944d', '#ffa366', '#ffb380', '#ffc299', '#ffd1b3', '#ffe0cc', '#fff0e6',
-        
-        # Yellows (10 shades)
-        '#ffff00', '#ffff1a', '#ffff33', '#ffff4d', '#ffff66', '#ffff80', '#ffff99', '#ffffb3', '#ffffcc', '#ffffe6',
-        
-        # Yellow-Green transition (10 shades)
-        '#e6ff00', '#ccff00', '#b3ff00', '#99ff00', '#80ff00', '#66ff00', '#4dff00', '#33ff00', '#1aff00', '#00ff00',
-        
-        # Green-Blue transition (10 shades)
-        '#00e600', '#00cc00', '#00b300', '#009900', '#008000', '#006600', '#004d00', '#003300', '#000066', '#000099'
-    ],
-    vmin=years.min(),
-    vmax=years.max()
-)
-
-# Add the colormap to the map
-colormap.add_to(nyc_map)
-colormap.caption = 'Year Founded'
-
-# Track matching statistics and unmatched BIDs
-total_bids = 0
-matched_bids = 0
-unmatched_bids = []
-
-# Create a mapping of BID names to their FY20 data
-fy20_data_dict = {}
-for _, row in fy20_data.iterrows():
-    bid_name = row['BID Name:']
-    # Convert numeric fields, handling NaN values
-    full_time = pd.to_numeric(row['Full-time staff'], errors='coerce', downcast='integer')
-    sanitation = pd.to_numeric(row['Sanitation staff employed'], errors='coerce', downcast='integer')
-    safety = pd.to_numeric(row['Public Safety staff employed'], errors='coerce', downcast='integer')
-    
-    full_time_total = 0
-    if pd.notna(full_time): full_time_total += full_time
-    if pd.notna(sanitation): full_time_total += sanitation
-    if pd.notna(safety): full_time_total += safety
-    
-    fy20_data_dict[bid_name] = {
-        'expenses': row['Total expenses'],
-        'full_time_total': full_time_total if full_time_total > 0 else None,
-        'trash_bags': pd.to_numeric(row['Trash bags collected'], errors='coerce', downcast='integer'),
-        'receptacles': pd.to_numeric(row['Trash and recycling receptacles serviced'], errors='coerce', downcast='integer'),
-        'safety_interactions': pd.to_numeric(row['Interactions with public safety officers'], errors='coerce', downcast='integer'),
-        'art_installations': pd.to_numeric(row['Public art installations sponsored'], errors='coerce', downcast='integer')
-    }
-
-# Get Church Avenue and Flatbush Avenue data for combined values
-church_ave_data = fy20_data[fy20_data['BID Name:'] == 'Church Avenue'].iloc[0]
-flatbush_ave_data = fy20_data[fy20_data['BID Name:'] == 'Flatbush Avenue'].iloc[0]
-
-# Function to safely add numeric values
-def safe_add(val1, val2):
-    if pd.isna(val1) and pd.isna(val2):
-        return None
-    elif pd.isna(val1):
-        return val2
-    elif pd.isna(val2):
-        return val1
-    return val1 + val2
-
-# Combine the data
-combined_data = {
-    'expenses': church_ave_expense + flatbush_ave_expense,
-    'full_time_total': safe_add(
-        fy20_data_dict['Church Avenue']['full_time_total'],
-        fy20_data_dict['Flatbush Avenue']['full_time_total']
-    ),
-    'trash_bags': safe_add(
-        fy20_data_dict['Church Avenue']['trash_bags'],
-        fy20_data_dict['Flatbush Avenue']['trash_bags']
-    ),
-    'receptacles': safe_add(
-        fy20_data_dict['Church Avenue']['receptacles'],
-        fy20_data_dict['Flatbush Avenue']['receptacles']
-    ),
-    'safety_interactions': safe_add(
-        fy20_data_dict['Church Avenue']['safety_interactions'],
-        fy20_data_dict['Flatbush Avenue']['safety_interactions']
-    ),
-    'art_installations': safe_add(
-        fy20_data_dict['Church Avenue']['art_installations'],
-        fy20_data_dict['Flatbush Avenue']['art_installations']
+from bid_matching import unique_fy20_names, match_summary
+from bid_registry import load_registry, combined_sources, DIRECTORY_CSV, REGISTRY_CSV
+from bid_geometry import (load_geometries, load_geometry_metrics, simplify_geometries, tolerance_for_zoom,
+                          CACHE_DIR)
+from bid_export import export_topojson, export_vector_tiles, LazyBoundaryLayer
+from trends_data import (load_trends_data, load_metrics, merge_bids, load_bid_table, metric_label,
+                         memory_report, MAP_SCHEMA, POINT_METRICS_CSV, GEOMETRY_METRICS_CSV)
+from bid_tooltips import (format_tooltip_fields, add_tooltip_metrics, render_tooltips,
+                          ClientTooltip, TOOLTIP_TEMPLATE)
+from bid_timeline import YearSlider
+from bid_choropleth import MetricSelector, METRIC_LABELS
+from run_report import RunReport, add_report_arguments
+from validation import validate_trends_csv, validate_boundaries, validate_directory, stop_on_problems
+
+BIDS_CSV = 'BIDs/NYC_BIDS_09112015_20250113.csv'
+FY20_CSV = 'BIDs/FY20_BID_Trends_Report_Data_20250110.csv'
+
+# Directory the map is written to; exported boundary files go alongside it
+MAP_DIR = 'BIDs'
+MAP_HTML = 'nyc_bids_map.html'
+
+# Founding-year colors with red-orange-yellow-green-blue transitions
+YEAR_COLORS = [
+    # Reds (10 shades)
+    '#67000d', '#800000', '#990000', '#b30000', '#cc0000', '#e60000', '#ff0000', '#ff1a1a', '#ff3333', '#ff4d4d',
+
+    # Red-Orange transition (10 shades)
+    '#ff6600', '#ff751a', '#ff8533', '#ff944d', '#ffa366', '#ffb380', '#ffc299', '#ffd1b3', '#ffe0cc', '#fff0e6',
+
+    # Yellows (10 shades)
+    '#ffff00', '#ffff1a', '#ffff33', '#ffff4d', '#ffff66', '#ffff80', '#ffff99', '#ffffb3', '#ffffcc', '#ffffe6',
+
+    # Yellow-Green transition (10 shades)
+    '#e6ff00', '#ccff00', '#b3ff00', '#99ff00', '#80ff00', '#66ff00', '#4dff00', '#33ff00', '#1aff00', '#00ff00',
+
+    # Green-Blue transition (10 shades)
+    '#00e600', '#00cc00', '#00b300', '#009900', '#008000', '#006600', '#004d00', '#003300', '#000066', '#000099'
+]
+
+# Directory columns shown in the tooltips and the metric selector
+DIRECTORY_LABELS = {'org_blocks': 'Blocks (BID Directory)', 'org_businesses': 'Businesses (BID Directory)'}
+
+# Directory columns the map and the BID registry read besides org_id
+DIRECTORY_COLUMNS = ['org_name', *DIRECTORY_LABELS]
+
+def parse_args(argv=None):
+    """Parse the map options; parse_args([]) gives the defaults"""
+    parser = argparse.ArgumentParser(description='Build the NYC BIDs map')
+    parser.add_argument('--render-mode', choices=['collection', 'per-bid'], default='collection',
+                        help='Draw all BIDs as one FeatureCollection layer, or one layer per BID')
+    parser.add_argument('--simplify-zoom', type=int, default=16,
+                        help='Highest zoom level boundaries are simplified for. Each BID is simplified on its '
+                             'own, so neighbouring BIDs can show small gaps or overlaps (TopoJSON export '
+                             'simplifies shared edges instead)')
+    parser.add_argument('--precision', type=int, default=6,
+                        help='Decimal places kept in boundary coordinates')
+    parser.add_argument('--no-simplify', action='store_true',
+                        help='Keep the full-precision boundaries from the CSV')
+    parser.add_argument('--simplify-report',
+                        help='Write the per-BID simplification report, with the measured boundary '
+                             'displacements, to this CSV file')
+    parser.add_argument('--boundary-format', choices=['inline', 'topojson', 'mvt'], default='inline',
+                        help='Embed boundaries in the HTML, or export them as TopoJSON or vector tiles '
+                             'that the map loads after the page (serve the BIDs folder over HTTP)')
+    parser.add_argument('--max-tile-zoom', type=int, default=14,
+                        help='Highest zoom level written when exporting vector tiles')
+    parser.add_argument('--time-slider', action='store_true',
+                        help='Add a year slider that shows the BIDs founded by each year '
+                             '(inline boundaries in collection mode only)')
+    parser.add_argument('--metric-selector', action='store_true',
+                        help='Add a control that colors the BIDs by any FY20, Directory or point metric '
+                             'in the browser (inline boundaries in collection mode only)')
+    add_report_arguments(parser, 'BIDs_map')
+    args = parser.parse_args(argv)
+    for option in ['time_slider', 'metric_selector']:
+        if getattr(args, option) and (args.render_mode != 'collection' or args.boundary_format != 'inline'):
+            parser.error(f"--{option.replace('_', '-')} needs --render-mode collection and --boundary-format inline")
+    return args
+
+def read_tables(bids_csv=BIDS_CSV, fy20_csv=FY20_CSV, directory_csv=DIRECTORY_CSV):
+    """Read the boundary attributes (without the WKT), the FY20 columns and the Directory counts the map uses"""
+    bids_data = pd.read_csv(bids_csv, usecols=lambda column: column != 'the_geom')
+    fy20_data = load_trends_data(fy20_csv, MAP_SCHEMA)
+    directory_data = pd.read_csv(directory_csv, usecols=['org_id', 'org_blocks', 'org_businesses'])
+    return bids_data, fy20_data, directory_data
+
+def validate_inputs(bids_csv=BIDS_CSV, fy20_csv=FY20_CSV, directory_csv=DIRECTORY_CSV, cache_dir=CACHE_DIR):
+    """Return the problems found in the map's input files, before any of them is loaded.
+
+    The boundaries are parsed into the geometry cache, so loading them
+    afterwards is only a cache read.
+    """
+    return (
+        validate_boundaries(bids_csv, cache_dir=cache_dir)
+        + validate_trends_csv(fy20_csv, MAP_SCHEMA)
+        + validate_directory(directory_csv, DIRECTORY_COLUMNS)
     )
-}
-
-# Special cases where we need to handle the data differently
-special_data = {
-    'Church Flatbush Community Alliance': combined_data
-}
-
-def get_fy20_data(bid_name, return_details=False):
-    # Check special data cases first
-    if bid_name in special_data:
-        if return_details:
-            return special_data[bid_name]
-        return special_data[bid_name]['expenses']
-    
-    # Check manual matches
-    if bid_name in manual_matches:
-        matched_name = manual_matches[bid_name]
-        if matched_name in fy20_data_dict:
-            if return_details:
-                return fy20_data_dict[matched_name]
-            return fy20_data_dict[matched_name]['expenses']
-
-    cleaned_name = clean_bid_name(bid_name)
-    
-    # Normal matching logic
-    if cleaned_name in fy20_cleaned_names:
-        matched_name = fy20_cleaned_names[cleaned_name][0]
-        if return_details:
-            return fy20_data_dict[matched_name]
-        return fy20_data_dict[matched_name]['expenses']
-    
-    # If no exact match, try fuzzy matching
-    best_ratio = 0
-    best_match = None
-    
-    for clean_name, (original_name, _) in fy20_cleaned_names.items():
-        # Skip the incorrect West Village -> Bayside Village match
-        if bid_name == 'West Village' and original_name == 'Bayside Village':
-            continue
-            
-        ratio = fuzz.ratio(cleaned_name, clean_name)
-        if ratio > best_ratio and ratio > 60:
-            best_ratio = ratio
-            best_match = original_name
-    
-    if best_match and best_match in fy20_data_dict:
-        if return_details:
-            return fy20_data_dict[best_match]
-        return fy20_data_dict[best_match]['expenses']
-    
-    if return_details:
-        return None
-    return None
-
-# Add BID boundaries to the map
-print("\nAdding boundaries to map...")
-for idx, row in bids_gdf.iterrows():
-    try:
-        total_bids += 1
-        # Get the FY20 data for this BID
-        bid_name = row['F_ALL_BI_2']
-        fy20_data = get_fy20_data(bid_name, return_details=True)
-        
-        if fy20_data is not None:
-            matched_bids += 1
-            expense_str = f"${fy20_data['expenses']:,.2f}"
-            
-            # Format the additional data points - show 0 instead of 'Not available' when we have data
-            full_time = fy20_data['full_time_total']
-            full_time_str = f"{int(full_time):,}" if pd.notna(full_time) else '0'
-            
-            trash_bags = fy20_data['trash_bags']
-            trash_bags_str = f"{int(trash_bags):,}" if pd.notna(trash_bags) else '0'
-            
-            receptacles = fy20_data['receptacles']
-            receptacles_str = f"{int(receptacles):,}" if pd.notna(receptacles) else '0'
-            
-            safety = fy20_data['safety_interactions']
-            safety_str = f"{int(safety):,}" if pd.notna(safety) else '0'
-            
-            art = fy20_data['art_installations']
-            art_str = f"{int(art):,}" if pd.notna(art) else '0'
-        else:
-            # Keep 'Not available' only when we have no data at all for the BID
-            expense_str = 'Not available'
-            full_time_str = 'Not available'
-            trash_bags_str = 'Not available'
-            receptacles_str = 'Not available'
-            safety_str = 'Not available'
-            art_str = 'Not available'
-        
-        # Create a tooltip with BID info
-        tooltip = f"""
-        <b>{bid_name}</b><br>
-        Founded: {int(row['Year_Found'])}<br>
-        <br>
-        <b>FY20 Data:</b><br>
-        Total Expenses: {expense_str}<br>
-        Full-time Staff: {full_time_str}<br>
-        Trash Bags Collected: {trash_bags_str}<br>
-        Receptacles Serviced: {receptacles_str}<br>
-        Public Safety Interactions: {safety_str}<br>
-        Public Art Installations: {art_str}
-        """
-        
-        # Add the polygon to the map
-        folium.GeoJson(
-            row['geometry'].__geo_interface__,
-            style_function=lambda x, year=row['Year_Found']: {
-                'fillColor': colormap(year),
-                'color': 'black',
-                'weight': 1,
-                'fillOpacity': 0.7
-            },
-            tooltip=tooltip
-        ).add_to(nyc_map)
-    except Exception as e:
-        print(f"Error adding BID {bid_name}: {str(e)}")
-
-print(f"\nMatched {matched_bids} out of {total_bids} BIDs with expense data")
-
-# Get all unmatched BIDs from both datasets
-matched_bids_names = set()
-for bid_name in bids_data['F_ALL_BI_2']:
-    if get_fy20_data(bid_name) is not None:
-        matched_bids_names.add(bid_name)
-
-matched_fy20_names = set()
-for bid_name in fy20_data_dict.keys():
-    # Check if this FY20 BID name is used in any match
-    is_matched = False
-    # Check manual matches
-    for orig_name, match_name in manual_matches.items():
-        if bid_name == match_name:
-            is_matched = True
-            break
-    # Check fuzzy matches
-    if not is_matched:
-        for orig_name in bids_data['F_ALL_BI_2']:
-            fy20_data = get_fy20_data(orig_name, return_details=True)
-            if fy20_data is not None and bid_name in fy20_data_dict:
-                is_matched = True
-                break
-    if is_matched:
-        matched_fy20_names.add(bid_name)
-
-unmatched_bids = set(bids_data['F_ALL_BI_2']) - matched_bids_names
-unmatched_fy20 = set(fy20_data_dict.keys()) - matched_fy20_names
-
-print("\n=== MATCHING SUMMARY ===")
-print(f"\nFrom the original BIDs dataset ({len(bids_data)} total BIDs):")
-print(f"Successfully matched: {matched_bids} BIDs")
-print(f"Unmatched: {total_bids - matched_bids} BIDs")
-print("\nThe unmatched BIDs are:")
-unmatched_original = []
-for bid_name in bids_data['F_ALL_BI_2']:
-    if get_fy20_data(bid_name) is None:
-        unmatched_original.append(bid_name)
-for name in sorted(unmatched_original):
-    print(f"  - {name}")
-
-print(f"\nFrom the FY20 dataset ({len(fy20_data_dict)} total BIDs):")
-print(f"Successfully matched: {len(matched_fy20_names)} BIDs")
-print(f"Unmatched: {len(unmatched_fy20)} BIDs")
-print("\nThe unmatched FY20 BIDs are:")
-for name in sorted(unmatched_fy20):
-    print(f"  - {name}")
-
-print("\nSaving map...")
-nyc_map.save('BIDs/nyc_bids_map.html')
-print("Done!")
 
+def resolve_matches(bids_data, fy20_data, registry_path=REGISTRY_CSV, bids_csv=BIDS_CSV,
+                    directory_csv=DIRECTORY_CSV, fy20_csv=FY20_CSV):
+    """Look every BID name up in the registry; only names it has not seen yet are matched.
+
+    Returns the registry, the number of links added to it and the match table.
+    """
+    registry, new_links = load_registry(registry_path, bids_csv, directory_csv, (fy20_csv,))
+    match_table = registry.match_table(bids_data['F_ALL_BI_2'], fy20_data['BID Name:'])
+    return registry, new_links, match_table
+
+def write_geometry_metrics(bids_data, match_table, bids_csv=BIDS_CSV, path=GEOMETRY_METRICS_CSV,
+                           cache_dir=CACHE_DIR):
+    """Measure the full-resolution boundaries (area, perimeter, compactness) for the analysis plots.
+
+    The measurements are cached until the CSV changes. Each BID's founding
+    year is written alongside them.
+    """
+    geometry_table = load_geometry_metrics(bids_csv, cache_dir=cache_dir).round(
+        {'area_sqft': 1, 'perimeter_ft': 1, 'centroid_lat': 6, 'centroid_lon': 6, 'compactness': 4}
+    )
+    geometry_table.insert(0, 'bid_name', bids_data['F_ALL_BI_2'].values)
+    geometry_table.insert(1, 'fy20_name', bids_data['F_ALL_BI_2'].map(unique_fy20_names(match_table)).values)
+    geometry_table.insert(2, 'year_found', bids_data['Year_Found'].values)
+    geometry_table.to_csv(path, index=False)
+    return geometry_table
+
+def simplify_boundaries(bids_gdf, zoom, precision, measure_displacement=False):
+    """Simplify the boundaries in place for the web map and return the per-BID simplification report"""
+    simplified, simplify_report = simplify_geometries(bids_gdf.geometry, zoom=zoom, precision=precision,
+                                                      measure_displacement=measure_displacement)
+    bids_gdf['geometry'] = simplified
+    simplify_report.insert(0, 'bid_name', bids_gdf['F_ALL_BI_2'])
+    return simplify_report
+
+def build_map(bids_gdf, fy20_data, match_table, registry, directory_data, point_metrics=None,
+              args=None, map_dir=MAP_DIR):
+    """Build the folium map of the BIDs, colored by founding year, with their tooltips.
+
+    `args` holds the map options (the defaults when None). Returns the map,
+    the number of BIDs matched to FY20 data and the boundary files exported
+    next to it (path -> number of vector tiles, or None for TopoJSON).
+    """
+    args = args or parse_args([])
+    exports = {}
+
+    # Create a base map centered on NYC
+    nyc_map = folium.Map(
+        location=[40.7128, -74.0060],
+        zoom_start=11,
+        tiles='CartoDB positron'
+    )
 
+    # Create a color map based on founding years
+    years = bids_gdf['Year_Found'].astype(float)
+    print(f"\nYear range: {years.min()} to {years.max()}")
+    colormap = LinearColormap(colors=YEAR_COLORS, vmin=years.min(), vmax=years.max())
+
+    # Add the colormap to the map; the metric selector draws its own legend
+    if not args.metric_selector:
+        colormap.add_to(nyc_map)
+    colormap.caption = 'Year Founded'
+
+    # Index the FY20 metrics by BID name.
+    # Combined BIDs (e.g. Church Flatbush) get a merged row summing their members
+    fy20_metrics = merge_bids(load_metrics(fy20_data), combined_sources(match_table))
+
+    # Add BID boundaries to the map
+    print("\nAdding boundaries to map...")
+    bid_fy20_names = bids_gdf['F_ALL_BI_2'].map(match_table['fy20_name'])
+    bid_metrics = fy20_metrics.reindex(bid_fy20_names)
+    matched = bid_fy20_names.notna().values
+
+    # Format every tooltip field for all BIDs in one pass
+    tooltip_fields = format_tooltip_fields(bids_gdf['F_ALL_BI_2'], bids_gdf['Year_Found'], bid_metrics, matched)
+    tooltip_template = TOOLTIP_TEMPLATE
+
+    # Add the Directory's block and business counts, summed over a BID's Directory entries
+    directory_data = directory_data.assign(bid_id=registry.bid_ids('directory', directory_data['org_id']).values)
+    directory_metrics = directory_data.groupby('bid_id')[list(DIRECTORY_LABELS)].sum(min_count=1)
+    tooltip_fields, tooltip_template = add_tooltip_metrics(
+        tooltip_fields,
+        directory_metrics.reindex(registry.bid_ids('boundary', bids_gdf['F_ALL_BI_2'])),
+        DIRECTORY_LABELS,
+        tooltip_template
+    )
+
+    # Add the metrics joined from point datasets (point_join.py), if there are any
+    if point_metrics is not None:
+        tooltip_fields, tooltip_template = add_tooltip_metrics(
+            tooltip_fields,
+            point_metrics.reindex(bids_gdf['F_ALL_BI_2']),
+            {column: metric_label(column) for column in point_metrics.columns},
+            tooltip_template
+        )
+
+    bid_geometries = list(bids_gdf.geometry)
+
+    def bid_style(year):
+        return {
+            'fillColor': colormap(year),
+            'color': 'black',
+            'weight': 1,
+            'fillOpacity': 0.7
+        }
+
+    if args.boundary_format != 'inline':
+        # Export boundaries next to the map and fetch them after the page loads
+        bids_layer = gpd.GeoDataFrame(tooltip_fields, geometry=bid_geometries, crs=bids_gdf.crs)
+        bids_layer['fill_color'] = [colormap(year) for year in bids_layer['year_found']]
+        if args.boundary_format == 'topojson':
+            tolerance = None if args.no_simplify else tolerance_for_zoom(args.simplify_zoom)
+            topojson_path = os.path.join(map_dir, 'nyc_bids.topojson')
+            size = export_topojson(bids_layer, topojson_path, tolerance=tolerance)
+            print(f"Wrote nyc_bids.topojson ({size:,} bytes)")
+            exports[topojson_path] = None
+            boundary_url = 'nyc_bids.topojson'
+        else:
+            tiles_path = os.path.join(map_dir, 'nyc_bids_tiles')
+            tile_count, size = export_vector_tiles(bids_layer, tiles_path, max_zoom=args.max_tile_zoom)
+            print(f"Wrote {tile_count:,} vector tiles ({size:,} bytes)")
+            exports[tiles_path] = tile_count
+            boundary_url = 'nyc_bids_tiles/{z}/{x}/{y}.pbf'
+        LazyBoundaryLayer(
+            boundary_url, args.boundary_format, tooltip_template, max_zoom=args.max_tile_zoom
+        ).add_to(nyc_map)
+    elif args.render_mode == 'per-bid':
+        # One GeoJson layer per BID with its tooltip rendered inline
+        tooltips = render_tooltips(tooltip_fields, tooltip_template)
+        for tooltip, year, geometry in zip(tooltips, tooltip_fields['year_found'], bid_geometries):
+            folium.GeoJson(
+                geometry.__geo_interface__,
+                style_function=lambda x, year=year: bid_style(year),
+                tooltip=tooltip
+            ).add_to(nyc_map)
+    else:
+        # All BIDs in a single FeatureCollection styled from its properties,
+        # with tooltips rendered in the browser from one shared template
+        bids_layer = gpd.GeoDataFrame(tooltip_fields, geometry=bid_geometries, crs=bids_gdf.crs)
+        geojson_layer = folium.GeoJson(
+            bids_layer,
+            name='BIDs',
+            style_function=lambda feature: bid_style(feature['properties']['year_found'])
+        )
+        geojson_layer.add_child(ClientTooltip(tooltip_template))
+        if args.time_slider:
+            geojson_layer.add_child(YearSlider(tooltip_fields['year_found']))
+        if args.metric_selector:
+            # Missing FY20 counts are zero for matched BIDs, as in the tooltips
+            fy20_columns = [column for column in METRIC_LABELS if column in bid_metrics.columns]
+            selector_metrics = pd.concat([
+                pd.DataFrame({'year_found': tooltip_fields['year_found'].values}),
+                pd.DataFrame(bid_metrics[fy20_columns].fillna(0).values, columns=fy20_columns).where(
+                    pd.Series(matched), axis=0),
+                pd.DataFrame(directory_metrics.reindex(
+                    registry.bid_ids('boundary', bids_gdf['F_ALL_BI_2'])).values, columns=directory_metrics.columns),
+            ], axis=1)
+            labels = {**METRIC_LABELS, **DIRECTORY_LABELS}
+            if point_metrics is not None:
+                point_values = point_metrics.reindex(bids_gdf['F_ALL_BI_2'])
+                selector_metrics = pd.concat([selector_metrics, pd.DataFrame(point_values.values,
+                                                                             columns=point_values.columns)], axis=1)
+                labels.update({column: metric_label(column) for column in point_metrics.columns})
+            geojson_layer.add_child(MetricSelector(
+                selector_metrics,
+                labels,
+                colors={'year_found': [colormap.rgb_hex_str(value) for value in colormap.index]},
+                prefixes={'expenses': '$'}
+            ))
+        geojson_layer.add_to(nyc_map)
+
+    return nyc_map, int(matched.sum()), exports
+
+def print_match_summary(summary, total_bids, matched_bids, fy20_names):
+    """Print how many BIDs of each dataset were matched, and the names that were not"""
+    unmatched_fy20 = summary['unmatched_fy20']
+    matched_fy20_count = fy20_names.nunique() - len(unmatched_fy20)
+
+    print("\n=== MATCHING SUMMARY ===")
+    print(f"\nFrom the original BIDs dataset ({total_bids} total BIDs):")
+    print(f"Successfully matched: {matched_bids} BIDs")
+    print(f"Unmatched: {total_bids - matched_bids} BIDs")
+    print("\nThe unmatched BIDs are:")
+    for name in summary['unmatched_bids']:
+        print(f"  - {name}")
+
+    print(f"\nFrom the FY20 dataset ({fy20_names.nunique()} total BIDs):")
+    print(f"Successfully matched: {matched_fy20_count} BIDs")
+    print(f"Unmatched: {len(unmatched_fy20)} BIDs")
+    print("\nThe unmatched FY20 BIDs are:")
+    for name in unmatched_fy20:
+        print(f"  - {name}")
+
+def main():
+    args = parse_args()
+
+    # Stage timings, counts and output sizes for the JSON run report
+    report = RunReport.from_args('BIDs_map', args)
+
+    # Check every input file before anything is loaded, matched, registered or drawn
+    print("Validating inputs...")
+    report.stage('validation')
+    stop_on_problems(validate_inputs(), report, args.report)
+
+    # Read the BIDs data and FY20 data
+    print("Reading data files...")
+    report.stage('csv_load')
+    bids_data, fy20_data, directory_data = read_tables()
+    report.record('fy20_memory', memory_report(fy20_data))
+
+    # Load the boundary geometries, parsing the WKT only when the CSV has changed
+    print("Loading geometries...")
+    report.stage('geometry_load')
+    bids_data['geometry'] = load_geometries(BIDS_CSV)
+
+    print("Resolving BID name matches...")
+    report.stage('name_matching')
+    registry, new_links, match_table = resolve_matches(bids_data, fy20_data)
+    if new_links:
+        print(f"Registered {new_links} new names in the BID registry")
+    report.count('new_registry_links', new_links)
+
+    report.stage('geometry_metrics')
+    write_geometry_metrics(bids_data, match_table)
+    report.add_output(GEOMETRY_METRICS_CSV)
+
+    # Convert to GeoDataFrame with correct CRS
+    bids_gdf = gpd.GeoDataFrame(bids_data, geometry='geometry', crs="EPSG:4326")
+
+    # Simplify boundaries and truncate coordinate precision for the web map.
+    # TopoJSON export simplifies the shared arcs itself instead.
+    if not args.no_simplify and args.boundary_format != 'topojson':
+        print(f"Simplifying geometries for zoom {args.simplify_zoom} at {args.precision} decimals...")
+        report.stage('simplify')
+        # Displacements are only measured for the per-BID report
+        simplify_report = simplify_boundaries(bids_gdf, args.simplify_zoom, args.precision,
+                                              measure_displacement=bool(args.simplify_report))
+
+        bytes_before = simplify_report['bytes_before'].sum()
+        bytes_after = simplify_report['bytes_after'].sum()
+        print(f"Geometry size: {bytes_before:,} -> {bytes_after:,} bytes "
+              f"({1 - bytes_after / bytes_before:.0%} saved)")
+        simplification = {
+            'bytes_before': int(bytes_before),
+            'bytes_after': int(bytes_after),
+        }
+        if args.simplify_report:
+            simplification['max_displacement_ft'] = round(float(simplify_report['max_displacement_ft'].max()), 1)
+            print("Largest boundary displacements:")
+            for _, row in simplify_report.nlargest(5, 'max_displacement_ft').iterrows():
+                print(f"  - {row['bid_name']}: {row['max_displacement_ft']:.1f} ft")
+            simplify_report.to_csv(args.simplify_report, index=False)
+            report.add_output(args.simplify_report)
+        report.record('simplification', simplification)
+
+    print("Creating map...")
+    report.stage('layer_construction')
+    nyc_map, matched_bids, exports = build_map(
+        bids_gdf, fy20_data, match_table, registry, directory_data, load_bid_table(POINT_METRICS_CSV), args
+    )
+    for path, tile_count in exports.items():
+        report.add_output(path)
+        if tile_count is not None:
+            report.count('vector_tiles', tile_count)
+
+    total_bids = len(bids_gdf)
+    print(f"\nMatched {matched_bids} out of {total_bids} BIDs with expense data")
+    report.count('bids', total_bids)
+    report.count('matched_bids', matched_bids)
+
+    # Get all unmatched BIDs from both datasets
+    summary = match_summary(match_table, fy20_data['BID Name:'])
+    report.record('matching', summary)
+    print_match_summary(summary, total_bids, matched_bids, fy20_data['BID Name:'])
+
+    print("\nSaving map...")
+    report.stage('html_serialization')
+    nyc_map.save(os.path.join(MAP_DIR, MAP_HTML))
+    report.add_output(os.path.join(MAP_DIR, MAP_HTML))
+    report.save(args.report)
+    print(f"Run report written to {args.report}")
+    print("Done!")
+
+if __name__ == '__main__':
+    main()
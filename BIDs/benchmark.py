@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from bid_geometry import load_geometries
+from trends_data import load_bid_table, POINT_METRICS_CSV
+from BIDs_map import (read_tables, validate_inputs, resolve_matches, write_geometry_metrics, simplify_boundaries,
+                      build_map, parse_args, MAP_HTML)
+from BIDs_analysis import FIGURES, PLOT_CONFIG, load_dataset, validate_dataset
+from bid_registry import DIRECTORY_CSV
+from synthetic_data import generate
+from run_report import peak_rss_mb
+
+BIDS_CSV = 'BIDs/NYC_BIDS_09112015_20250113.csv'
+FY20_CSV = 'BIDs/FY20_BID_Trends_Report_Data_20250110.csv'
+RESULTS_DIR = 'BIDs/.benchmarks'
+
+def run_stages(bids_csv, fy20_csv, directory_csv, work_dir, expected_matches=None, point_metrics_csv=None):
+    """Run the map and analysis stages on one dataset and time each of them.
+
+    The stages call the same functions as BIDs_map.py (default options)
+    and BIDs_analysis.py, writing to `work_dir`. The geometry cache and the
+    BID registry start empty there, so the WKT is really parsed (by the
+    validation stage, which fills the cache) and every name is matched,
+    as on a first run. Returns per-stage seconds and peak
+    memory, and the byte size of every output. With `expected_matches`
+    (the correct FY20 name per BID, from the synthetic data) the share of
+    BIDs matched correctly is reported as well.
+    """
+    stages = {}
+    outputs = {}
+    cache_dir = os.path.join(work_dir, 'cache')
+    geometry_metrics_csv = os.path.join(work_dir, 'bid_geometry_metrics.csv')
+
+    @contextmanager
+    def stage(name):
+        start = time.perf_counter()
+        yield
+        stages[name] = {'seconds': round(time.perf_counter() - start, 4), 'peak_rss_mb': round(peak_rss_mb(), 1)}
+
+    # Recorded rather than fatal: noisy synthetic names can collide.
+    # Validation parses the WKT into the empty cache, as on a first run.
+    with stage('validation'):
+        problems = list(dict.fromkeys(
+            validate_inputs(bids_csv, fy20_csv, directory_csv, cache_dir) + validate_dataset(fy20_csv)
+        ))
+
+    with stage('csv_load'):
+        bids_data, fy20_data, directory_data = read_tables(bids_csv, fy20_csv, directory_csv)
+
+    with stage('geometry_load'):
+        bids_data['geometry'] = load_geometries(bids_csv, cache_dir=cache_dir)
+
+    with stage('name_matching'):
+        registry, _, match_table = resolve_matches(
+            bids_data, fy20_data, os.path.join(work_dir, 'bid_registry.csv'), bids_csv, directory_csv, fy20_csv
+        )
+
+    with stage('geometry_metrics'):
+        write_geometry_metrics(bids_data, match_table, bids_csv, geometry_metrics_csv, cache_dir)
+
+    with stage('simplify'):
+        bids_gdf = gpd.GeoDataFrame(bids_data, geometry='geometry', crs='EPSG:4326')
+        simplify_boundaries(bids_gdf, zoom=16, precision=6)
+
+    with stage('layer_construction'):
+        point_metrics = load_bid_table(point_metrics_csv) if point_metrics_csv else None
+        nyc_map, matched, _ = build_map(bids_gdf, fy20_data, match_table, registry, directory_data,
+                                        point_metrics, parse_args([]), work_dir)
+
+    with stage('html_serialization'):
+        map_path = os.path.join(work_dir, MAP_HTML)
+        nyc_map.save(map_path)
+        outputs[MAP_HTML] = os.path.getsize(map_path)
+
+    with stage('plot_rendering'):
+        dataset = load_dataset(fy20_csv, geometry_metrics_csv)
+        for filename, plot in FIGURES.items():
+            html = plot(*dataset).to_html(full_html=False, include_plotlyjs=False, config=PLOT_CONFIG)
+            outputs[filename] = len(html.encode())
+
+    results = {
+        'bids': len(bids_data),
+        'fy20_rows': len(fy20_data),
+        'matched': matched,
+        'validation_problems': problems,
+        'input_bytes': os.path.getsize(bids_csv) + os.path.getsize(fy20_csv) + os.path.getsize(directory_csv),
+        'stages': stages,
+        'total_seconds': round(sum(entry['seconds'] for entry in stages.values()), 4),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'output_bytes': outputs,
+    }
+    if expected_matches is not None:
+        expected = expected_matches.reindex(match_table.index)
+        correct = (match_table['fy20_name'] == expected) | (match_table['fy20_name'].isna() & expected.isna())
+        results['match_accuracy'] = round(float(correct.mean()), 4)
+    return results
+
+def run_scale(scale, vertices=800, name_noise=0.2, seed=0):
+    """Benchmark one scale in this process and return its results.
+
+    Scale 1 is the bundled data; larger scales use a synthetic dataset with
+    `scale` times as many BIDs.
+    """
+    with tempfile.TemporaryDirectory() as work_dir:
+        if scale == 1:
+            results = run_stages(BIDS_CSV, FY20_CSV, DIRECTORY_CSV, work_dir, point_metrics_csv=POINT_METRICS_CSV)
+        else:
+            bid_count = len(pd.read_csv(BIDS_CSV, usecols=['F_ALL_BI_2'])) * scale
+            paths = generate(bid_count, os.path.join(work_dir, 'data'), vertices, name_noise, seed)
+            expected_matches = pd.read_csv(paths['matches'], index_col='bid_name')['fy20_name']
+            results = run_stages(paths['bids'], paths['fy20'], paths['directory'], work_dir, expected_matches)
+            results['synthetic'] = {'vertices': vertices, 'name_noise': name_noise, 'seed': seed}
+    results['scale'] = scale
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def print_results(results, baseline=None):
+    baseline_runs = {run['scale']: run for run in baseline['runs']} if baseline else {}
+    for run in results['runs']:
+        print(f"\n{run['bids']:,} BIDs (x{run['scale']}), {run['input_bytes']:,} input bytes, "
+              f"peak {run['peak_rss_mb']:,.0f} MB")
+        if 'match_accuracy' in run:
+            print(f"  {run['matched']:,} matched, {run['match_accuracy']:.1%} correctly")
+        base_run = baseline_runs.get(run['scale'])
+        for name, entry in run['stages'].items():
+            line = f"  {name:<20} {entry['seconds']:>9.3f}s  {entry['peak_rss_mb']:>8,.0f} MB"
+            if base_run and name in base_run['stages'] and base_run['stages'][name]['seconds'] > 0:
+                line += f"  {entry['seconds'] / base_run['stages'][name]['seconds']:>6.2f}x baseline"
+            print(line)
+        print(f"  {'total':<20} {run['total_seconds']:>9.3f}s")
+        print(f"  map HTML {run['output_bytes'][MAP_HTML]:,} bytes, plots "
+              f"{sum(size for name, size in run['output_bytes'].items() if name != MAP_HTML):,} bytes")
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the map and analysis stages on the bundled and scaled data')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                        help='Dataset sizes, as multiples of the bundled BIDs')
+    parser.add_argument('--vertices', type=int, default=800, help='Vertices per synthetic BID boundary')
+    parser.add_argument('--name-noise', type=float, default=0.2,
+                        help='Share of synthetic FY20 names that are spelled differently')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic data')
+    parser.add_argument('--output', help=f'Results JSON file (default: {RESULTS_DIR}/<commit>.json)')
+    parser.add_argument('--compare', help='Earlier results JSON to compare stage timings with')
+    parser.add_argument('--single-scale', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Worker mode: benchmark one scale and print its results as JSON
+    if args.single_scale:
+        print(json.dumps(run_scale(args.single_scale, args.vertices, args.name_noise, args.seed)))
+        return
+
+    # Each scale runs in its own process so peak memory is measured separately
+    runs = []
+    for scale in args.scales:
+        print(f"Benchmarking x{scale}...")
+        completed = subprocess.run([
+            sys.executable, __file__, '--single-scale', str(scale), '--vertices', str(args.vertices),
+            '--name-noise', str(args.name_noise), '--seed', str(args.seed)
+        ], capture_output=True, text=True)
+        if completed.returncode != 0:
+            sys.exit(completed.stderr)
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'runs': runs,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    print(f"\nSaved {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# Budget size buckets, by total expenses in dollars
+SIZE_BUCKET_EDGES = [0, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000, np.inf]
+SIZE_BUCKET_LABELS = ['< $250K', '$250K-500K', '$500K-1M', '$1M-2.5M', '$2.5M-5M', '$5M+']
+
+def size_buckets(totals):
+    """Return the budget size bucket of each total as a categorical Series"""
+    return pd.cut(totals, SIZE_BUCKET_EDGES, labels=SIZE_BUCKET_LABELS, right=False)
+
+class ExpenseCube:
+    """Expense category sums and shares per BID, with the dimensions to slice them by.
+
+    `amounts` holds each BID's spending per category, `total` their sum and
+    `shares` each category's percentage of the BID's total; all three are
+    indexed by BID name and built in one vectorized pass. `dimensions` holds
+    the 'borough', 'size_bucket' and, when `founding_years` (indexed by BID
+    name) is given, 'founding_decade' of every BID.
+
+    Queries only select and group rows of these tables, so a new comparison
+    does not need another pass over the source data.
+    """
+
+    def __init__(self, bid_data, columns, name_column='BID Name:', borough_column='Borough',
+                 founding_years=None):
+        self.columns = list(columns)
+        self.amounts = bid_data[self.columns].astype(float)
+        self.amounts.index = pd.Index(bid_data[name_column], name='bid_name')
+        self.total = self.amounts.sum(axis=1)
+        self.shares = self.amounts.div(self.total, axis=0) * 100
+
+        self.dimensions = pd.DataFrame({
+            'borough': bid_data[borough_column].values,
+            'size_bucket': size_buckets(self.total).values,
+        }, index=self.amounts.index)
+        if founding_years is not None:
+            years = pd.Series(founding_years).reindex(self.amounts.index)
+            self.dimensions['founding_decade'] = (years // 10 * 10).astype('Int64')
+
+    def top(self, n):
+        """Names of the `n` BIDs with the largest total expenses"""
+        return self.total.nlargest(n).index
+
+    def bottom(self, n):
+        """Names of the `n` BIDs with the smallest total expenses"""
+        return self.total.nsmallest(n).index
+
+    def where(self, **values):
+        """Names of the BIDs whose dimensions equal the given values, e.g. where(borough='MN')"""
+        mask = np.ones(len(self.dimensions), dtype=bool)
+        for dimension, value in values.items():
+            mask &= (self.dimensions[dimension] == value).fillna(False).to_numpy(dtype=bool)
+        return self.dimensions.index[mask]
+
+    def weighted_shares(self, bids=None):
+        """Dollar-weighted share (%) of each category over the selected BIDs (default all)"""
+        amounts = self.amounts if bids is None else self.amounts.loc[bids]
+        sums = amounts.sum()
+        return sums / sums.sum() * 100
+
+    def simple_shares(self, bids=None):
+        """Average of the selected BIDs' category shares (%), each BID counting equally
+
+        A category a BID does not report counts as a 0% share.
+        """
+        shares = self.shares if bids is None else self.shares.loc[bids]
+        return shares.sum() / len(shares)
+
+    def rollup(self, dimension, weighted=True):
+        """Category shares (%) for every value of a dimension, one row per group"""
+        groups = self.dimensions[dimension]
+        if not weighted:
+            return self.shares.fillna(0).groupby(groups, observed=True).mean()
+        sums = self.amounts.groupby(groups, observed=True).sum()
+        return sums.div(sums.sum(axis=1), axis=0) * 100
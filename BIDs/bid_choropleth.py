@@ -0,0 +1,149 @@
+import pandas as pd
+from branca.element import MacroElement
+from folium.template import Template
+
+# Names shown in the metric menu for the tooltip metrics
+METRIC_LABELS = {
+    'year_found': 'Year Founded',
+    'expenses': 'Total Expenses',
+    'full_time_total': 'Full-time Staff',
+    'trash_bags': 'Trash Bags Collected',
+    'receptacles': 'Receptacles Serviced',
+    'safety_interactions': 'Public Safety Interactions',
+    'art_installations': 'Public Art Installations',
+}
+
+# Sequential palette (light to dark) for every metric except the founding year
+METRIC_COLORS = ['#ffffcc', '#ffeda0', '#fed976', '#feb24c', '#fd8d3c', '#fc4e2a', '#e31a1c', '#bd0026', '#800026']
+
+# Fill for BIDs without a value
+MISSING_COLOR = '#cccccc'
+
+def metric_table(metrics, labels, digits=2):
+    """Return a per-BID metric table as compact JSON-ready columns.
+
+    `metrics` has one row per map feature, in feature order. Each column
+    becomes a list of numbers with None for missing values; 'metrics' lists
+    the (column, label) pairs in menu order.
+    """
+    values = {}
+    for column in metrics.columns:
+        column_values = pd.to_numeric(pd.Series(metrics[column].values), errors='coerce').round(digits)
+        values[column] = [
+            None if pd.isna(value) else int(value) if float(value).is_integer() else float(value)
+            for value in column_values
+        ]
+    return {'metrics': [[column, labels[column]] for column in metrics.columns], 'values': values}
+
+class MetricSelector(MacroElement):
+    """Control that recolors the BIDs by a chosen metric, in the browser.
+
+    Added as a child of the GeoJson layer holding all BIDs. `metrics` holds
+    one row per feature; the control switches the colored column and
+    between a linear and a quantile color scale, and draws a matching
+    legend. `colors` maps a metric to its palette (METRIC_COLORS by default);
+    `prefixes` maps a metric to a unit prefix for the legend, e.g. '$'.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var layer = {{ this._parent.get_name() }};
+            var table = {{ this.table|tojson }};
+            var palettes = {{ this.colors|tojson }};
+            var prefixes = {{ this.prefixes|tojson }};
+            var features = layer.getLayers();
+
+            var control = L.control({position: 'topright'});
+            control.onAdd = function() {
+                var div = L.DomUtil.create('div', 'leaflet-bar');
+                div.style.cssText = 'background: white; padding: 6px 10px; font: 13px sans-serif; width: 240px;';
+                var options = table.metrics.map(function(metric) {
+                    return '<option value="' + metric[0] + '">' + metric[1] + '</option>';
+                }).join('');
+                div.innerHTML = '<select name="metric" style="width: 100%;">' + options + '</select>'
+                    + '<select name="scale" style="width: 100%; margin-top: 4px;">'
+                    + '<option value="linear">Linear scale</option><option value="quantile">Quantile scale</option>'
+                    + '</select>'
+                    + '<div class="bar" style="height: 12px; margin-top: 6px; border: 1px solid #999;"></div>'
+                    + '<div class="ticks" style="display: flex; justify-content: space-between;"></div>';
+                L.DomEvent.disableClickPropagation(div);
+                L.DomEvent.disableScrollPropagation(div);
+                return div;
+            };
+            control.addTo(layer._map);
+
+            var container = control.getContainer();
+            var metricSelect = container.querySelector('select[name=metric]');
+            var scaleSelect = container.querySelector('select[name=scale]');
+            metricSelect.value = {{ this.default|tojson }};
+
+            function hexToRgb(hex) {
+                return [1, 3, 5].map(function(i) { return parseInt(hex.slice(i, i + 2), 16); });
+            }
+
+            // Color at t in [0, 1], interpolated between evenly spaced stops
+            function colorAt(stops, t) {
+                var position = Math.min(Math.max(t, 0), 1) * (stops.length - 1);
+                var i = Math.min(Math.floor(position), stops.length - 2);
+                var a = hexToRgb(stops[i]), b = hexToRgb(stops[i + 1]), f = position - i;
+                return 'rgb(' + a.map(function(value, k) {
+                    return Math.round(value + (b[k] - value) * f);
+                }).join(',') + ')';
+            }
+
+            function formatValue(metric, value) {
+                if (metric === 'year_found') { return String(Math.round(value)); }
+                return (prefixes[metric] || '') + value.toLocaleString(undefined, {maximumFractionDigits: 0});
+            }
+
+            function update() {
+                var metric = metricSelect.value;
+                var values = table.values[metric];
+                var stops = palettes[metric] || palettes['default'];
+                var present = values.filter(function(value) { return value !== null; });
+                var sorted = present.slice().sort(function(a, b) { return a - b; });
+                var low = sorted[0], high = sorted[sorted.length - 1];
+
+                // Quantile scale: position of each value among the sorted values (ties share one)
+                var ranks = {};
+                sorted.forEach(function(value, i) {
+                    ranks[value] = ranks[value] === undefined ? [i, i] : [ranks[value][0], i];
+                });
+                function position(value) {
+                    if (scaleSelect.value === 'quantile') {
+                        return sorted.length > 1 ? (ranks[value][0] + ranks[value][1]) / 2 / (sorted.length - 1) : 0;
+                    }
+                    return high > low ? (value - low) / (high - low) : 0;
+                }
+
+                values.forEach(function(value, i) {
+                    features[i].setStyle({
+                        fillColor: value === null ? {{ this.missing_color|tojson }} : colorAt(stops, position(value))
+                    });
+                });
+
+                container.querySelector('.bar').style.background =
+                    'linear-gradient(to right, ' + stops.join(', ') + ')';
+                var middle = scaleSelect.value === 'quantile'
+                    ? sorted[Math.floor((sorted.length - 1) / 2)] : (low + high) / 2;
+                container.querySelector('.ticks').innerHTML = sorted.length ? [low, middle, high].map(function(value) {
+                    return '<span>' + formatValue(metric, value) + '</span>';
+                }).join('') : '<span>No data</span>';
+            }
+
+            metricSelect.addEventListener('change', update);
+            scaleSelect.addEventListener('change', update);
+            update();
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, metrics, labels=METRIC_LABELS, default='year_found', colors=None, prefixes=None):
+        super().__init__()
+        self._name = 'MetricSelector'
+        self.table = metric_table(metrics, labels)
+        self.default = default
+        self.colors = {'default': METRIC_COLORS, **(colors or {})}
+        self.prefixes = prefixes or {}
+        self.missing_color = MISSING_COLOR
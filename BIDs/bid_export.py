@@ -0,0 +1,177 @@
+import os
+from collections import defaultdict
+import shapely
+from branca.element import MacroElement
+from folium.elements import JSCSSMixin
+from folium.template import Template
+
+# Half the width of the Web Mercator world, in metres
+MERCATOR_HALF_WORLD = 20037508.342789244
+
+# Layer / object name used inside the exported files
+LAYER_NAME = 'bids'
+
+# Lowest zoom level vector tiles are exported for; the map overzooms them below it
+MIN_TILE_ZOOM = 10
+
+def export_topojson(bids_layer, path, tolerance=None, quantization=1e6):
+    """Write the BIDs as TopoJSON with arcs shared between adjacent boundaries.
+
+    Simplification (in degrees) is applied to the shared arcs, so neighbouring
+    BIDs keep a common edge. Returns the number of bytes written.
+    """
+    import topojson
+
+    topology = topojson.Topology(
+        bids_layer.to_crs('EPSG:4326'),
+        prequantize=quantization,
+        toposimplify=tolerance or False,
+        object_name=LAYER_NAME
+    )
+    with open(path, 'w') as f:
+        f.write(topology.to_json())
+    return os.path.getsize(path)
+
+def tile_range(bounds, zoom):
+    """Return the x/y tile ranges covering Web Mercator bounds at a zoom level."""
+    tile_size = 2 * MERCATOR_HALF_WORLD / 2 ** zoom
+    last = 2 ** zoom - 1
+    min_x = min(max(int((bounds[0] + MERCATOR_HALF_WORLD) // tile_size), 0), last)
+    max_x = min(max(int((bounds[2] + MERCATOR_HALF_WORLD) // tile_size), 0), last)
+    min_y = min(max(int((MERCATOR_HALF_WORLD - bounds[3]) // tile_size), 0), last)
+    max_y = min(max(int((MERCATOR_HALF_WORLD - bounds[1]) // tile_size), 0), last)
+    return range(min_x, max_x + 1), range(min_y, max_y + 1)
+
+def export_vector_tiles(bids_layer, directory, min_zoom=MIN_TILE_ZOOM, max_zoom=14, extent=4096, buffer=64):
+    """Write the BIDs as a {z}/{x}/{y}.pbf directory of Mapbox vector tiles.
+
+    Only tiles that intersect a BID are written. Returns the number of tiles
+    and the total bytes written.
+    """
+    import mapbox_vector_tile
+
+    mercator = bids_layer.to_crs('EPSG:3857')
+    geometries = mercator.geometry.values
+    properties = mercator.drop(columns=mercator.geometry.name).to_dict('records')
+    bounds = shapely.bounds(geometries)
+
+    tile_count = 0
+    total_bytes = 0
+    for zoom in range(min_zoom, max_zoom + 1):
+        tile_size = 2 * MERCATOR_HALF_WORLD / 2 ** zoom
+        margin = tile_size * buffer / extent
+
+        # Group BIDs by the tiles their bounding boxes touch
+        tiles = defaultdict(list)
+        for i, geometry_bounds in enumerate(bounds):
+            xs, ys = tile_range(geometry_bounds, zoom)
+            for x in xs:
+                for y in ys:
+                    tiles[(x, y)].append(i)
+
+        for (x, y), ids in tiles.items():
+            min_x = x * tile_size - MERCATOR_HALF_WORLD
+            max_y = MERCATOR_HALF_WORLD - y * tile_size
+            tile_bounds = (min_x, max_y - tile_size, min_x + tile_size, max_y)
+            clipped = shapely.clip_by_rect(
+                geometries[ids],
+                tile_bounds[0] - margin, tile_bounds[1] - margin,
+                tile_bounds[2] + margin, tile_bounds[3] + margin
+            )
+            features = [
+                {'geometry': geometry, 'properties': properties[i]}
+                for i, geometry in zip(ids, clipped) if not geometry.is_empty
+            ]
+            if not features:
+                continue
+
+            tile = mapbox_vector_tile.encode(
+                {'name': LAYER_NAME, 'features': features},
+                default_options={'quantize_bounds': tile_bounds, 'extents': extent}
+            )
+            tile_dir = os.path.join(directory, str(zoom), str(x))
+            os.makedirs(tile_dir, exist_ok=True)
+            with open(os.path.join(tile_dir, f'{y}.pbf'), 'wb') as f:
+                f.write(tile)
+            tile_count += 1
+            total_bytes += len(tile)
+    return tile_count, total_bytes
+
+class LazyBoundaryLayer(JSCSSMixin, MacroElement):
+    """Leaflet layer that fetches BID boundaries after the page has loaded.
+
+    `data_format` is 'topojson' for a single TopoJSON file or 'mvt' for a
+    {z}/{x}/{y}.pbf tile directory. Features are filled with their
+    'fill_color' property and get a tooltip rendered from `tooltip_template`.
+    `min_zoom` and `max_zoom` are the zoom levels the tiles were exported
+    for; other zoom levels reuse the nearest exported tiles.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        function {{ this.get_name() }}_tooltip(properties) {
+            return {{ this.tooltip_template|tojson }}.replace(/\\{(\\w+)\\}/g, function(match, field) {
+                return properties[field];
+            });
+        }
+        function {{ this.get_name() }}_style(properties) {
+            return {
+                fill: true,
+                fillColor: properties.fill_color,
+                fillOpacity: 0.7,
+                color: 'black',
+                weight: 1
+            };
+        }
+        {%- if this.data_format == 'topojson' %}
+        fetch({{ this.url|tojson }})
+            .then(function(response) { return response.json(); })
+            .then(function(topology) {
+                var features = topojson.feature(topology, topology.objects[{{ this.layer_name|tojson }}]);
+                L.geoJson(features, {
+                    style: function(feature) { return {{ this.get_name() }}_style(feature.properties); },
+                    onEachFeature: function(feature, layer) {
+                        layer.bindTooltip({{ this.get_name() }}_tooltip(feature.properties), {sticky: true});
+                    }
+                }).addTo({{ this._parent.get_name() }});
+            });
+        {%- else %}
+        // One tooltip for the whole layer, moved to the BID under the pointer
+        var {{ this.get_name() }}_hover = L.tooltip({sticky: true});
+        var {{ this.get_name() }} = L.vectorGrid.protobuf({{ this.url|tojson }}, {
+            interactive: true,
+            minNativeZoom: {{ this.min_zoom }},
+            maxNativeZoom: {{ this.max_zoom }},
+            vectorTileLayerStyles: {
+                {{ this.layer_name|tojson }}: {{ this.get_name() }}_style
+            }
+        }).on('mouseover', function(e) {
+            {{ this.get_name() }}_hover
+                .setLatLng(e.latlng)
+                .setContent({{ this.get_name() }}_tooltip(e.layer.properties))
+                .openOn({{ this._parent.get_name() }});
+        }).on('mouseout', function() {
+            {{ this._parent.get_name() }}.closeTooltip({{ this.get_name() }}_hover);
+        }).addTo({{ this._parent.get_name() }});
+        {%- endif %}
+        {% endmacro %}
+    """)
+
+    default_js = [
+        ('topojson-client', 'https://cdn.jsdelivr.net/npm/topojson-client@3/dist/topojson-client.min.js'),
+        ('vectorgrid', 'https://unpkg.com/leaflet.vectorgrid@1.3.0/dist/Leaflet.VectorGrid.bundled.js'),
+    ]
+
+    def __init__(self, url, data_format, tooltip_template, min_zoom=MIN_TILE_ZOOM, max_zoom=14):
+        super().__init__()
+        self._name = 'LazyBoundaryLayer'
+        self.url = url
+        self.data_format = data_format
+        self.tooltip_template = tooltip_template
+        self.layer_name = LAYER_NAME
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.default_js = [
+            script for script in self.default_js
+            if script[0] == ('topojson-client' if data_format == 'topojson' else 'vectorgrid')
+        ]
@@ -0,0 +1,142 @@
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+import shapely
+from bid_geometry import load_geometries
+
+BIDS_CSV = 'BIDs/NYC_BIDS_09112015_20250113.csv'
+NAME_COLUMN = 'F_ALL_BI_2'
+
+class BIDLookup:
+    """Find the BID containing each of a batch of points.
+
+    Builds an STRtree over the full-resolution BID boundaries (lon/lat,
+    EPSG:4326). Points on a boundary shared by two BIDs go to the first of
+    them; points outside every BID get index -1 and name None.
+    """
+
+    def __init__(self, geometries, names):
+        self.geometries = np.asarray(geometries)
+        self.names = np.asarray(names, dtype=object)
+        shapely.prepare(self.geometries)
+        self.tree = shapely.STRtree(self.geometries)
+
+    @classmethod
+    def from_csv(cls, csv_path=BIDS_CSV, name_column=NAME_COLUMN):
+        names = pd.read_csv(csv_path, usecols=[name_column])[name_column].values
+        return cls(load_geometries(csv_path), names)
+
+    def lookup(self, lons, lats):
+        """Return the index of the BID containing each point, or -1.
+
+        `lons` and `lats` must be one-dimensional arrays of finite numbers
+        of the same length; ValueError is raised otherwise.
+        """
+        lons, lats = check_points(lons, lats)
+        points = shapely.points(lons, lats)
+        point_ids, bid_ids = self.tree.query(points, predicate='intersects')
+
+        # The tree returns matches in no particular order: sort them by point,
+        # then BID, so the first matching BID wins for boundary points
+        order = np.lexsort((bid_ids, point_ids))
+        matched_points, first = np.unique(point_ids[order], return_index=True)
+        indices = np.full(len(points), -1, dtype=np.int64)
+        indices[matched_points] = bid_ids[order][first]
+        return indices
+
+    def lookup_names(self, lons, lats):
+        """Return the name of the BID containing each point, or None"""
+        indices = self.lookup(lons, lats)
+        names = self.names[np.maximum(indices, 0)]
+        names[indices < 0] = None
+        return names
+
+def check_points(lons, lats):
+    """Return lons and lats as float arrays, or raise ValueError if they are not matching lists of numbers"""
+    try:
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError('lat and lon must be numbers')
+    if lats.ndim != 1 or lons.ndim != 1:
+        raise ValueError('lat and lon must be lists of numbers')
+    if lats.shape != lons.shape:
+        raise ValueError('lat and lon must have the same length')
+    if not (np.isfinite(lats).all() and np.isfinite(lons).all()):
+        raise ValueError('lat and lon must be finite numbers')
+    return lons, lats
+
+def split_values(values):
+    """Flatten repeated and comma-separated query parameter values"""
+    return [item for value in values for item in value.split(',') if item]
+
+def make_handler(bid_lookup):
+    """Request handler answering /lookup with the BID of each lat/lon pair.
+
+    GET  /lookup?lat=40.75,40.71&lon=-73.98,-74.01
+    POST /lookup with a JSON body {"lat": [...], "lon": [...]}
+
+    Both return {"bids": [name or null, ...]} in the order of the points.
+    """
+
+    class LookupHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != '/lookup':
+                return self.send_json(404, {'error': 'unknown path'})
+            query = parse_qs(url.query)
+            self.answer(split_values(query.get('lat', [])), split_values(query.get('lon', [])))
+
+        def do_POST(self):
+            if urlparse(self.path).path != '/lookup':
+                return self.send_json(404, {'error': 'unknown path'})
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            except ValueError:
+                body = None
+            if not isinstance(body, dict):
+                return self.send_json(400, {'error': 'body must be a JSON object'})
+            self.answer(body.get('lat', []), body.get('lon', []))
+
+        def answer(self, lats, lons):
+            try:
+                lons, lats = check_points(lons, lats)
+            except ValueError as error:
+                return self.send_json(400, {'error': str(error)})
+            self.send_json(200, {'bids': bid_lookup.lookup_names(lons, lats).tolist()})
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return LookupHandler
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve point-to-BID lookups over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    bid_lookup = BIDLookup.from_csv()
+    print(f"Indexed {len(bid_lookup.names)} BIDs in {time.perf_counter() - start:.2f}s")
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(bid_lookup))
+    print(f"Listening on http://{args.host}:{args.port}/lookup")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
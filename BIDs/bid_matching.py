@@ -0,0 +1,224 @@
+import re
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+from fuzzywuzzy import fuzz
+
+# Manual overrides for specific matches
+MANUAL_MATCHES = {
+    'Alliance for Downtown New York': 'Downtown Alliance',
+    'Myrtle Avenue': 'Myrtle Avenue (Queens)',
+    'Myrtle Avenue Brooklyn Partnership': 'Myrtle Avenue (Brooklyn)',
+    'Lower East Side': 'Lower East Side Partnership',
+    'SoHo Broadway': 'SoHo Broadway Initiative',
+    'Fulton Area Business (FAB) Alliance': 'FAB Fulton',
+    '47th Street (Diamond District Partnership)': 'Diamond District Partnership',
+}
+
+# BIDs whose data is combined from several FY20 entries
+SPECIAL_MATCHES = {
+    'Church Flatbush Community Alliance': ['Church Avenue', 'Flatbush Avenue'],
+    'Downtown Jamaica': ['Jamaica Center', '165th Street Mall', 'Sutphin Boulevard'],
+}
+
+# Fuzzy matches that score above the threshold but are wrong
+EXCLUDED_MATCHES = {
+    ('West Village', 'Bayside Village'),
+}
+
+def clean_bid_name(name):
+    # Remove common variations and standardize
+    name = str(name).lower()
+    name = re.sub(r'\s+bid\b', '', name)  # Remove ' BID' at the end
+    name = re.sub(r'\bdistrict\b', '', name)  # Remove 'district'
+    name = re.sub(r'\b(business improvement|improvement)\b', '', name)  # Remove 'business improvement' or 'improvement'
+    name = re.sub(r'[^\w\s]', '', name)  # Remove special characters
+    name = re.sub(r'\s+', ' ', name)  # Normalize whitespace
+    return name.strip()
+
+def name_ngrams(name, n=3):
+    """Return the set of character n-grams of a cleaned name, padded with spaces."""
+    padded = f" {name} "
+    return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+class NGramMatcher:
+    """Fuzzy matcher that only scores the most promising candidates.
+
+    Cleaned target names are indexed by character n-grams. For each query the
+    targets sharing the most n-grams (by Dice coefficient) are kept, targets
+    that cannot reach the threshold on length alone are dropped, and the
+    survivors are verified with fuzz.ratio using the same semantics as a full
+    scan: the score must exceed the threshold and ties go to the earlier name.
+    """
+
+    def __init__(self, target_names, n=3, top_k=10, threshold=60):
+        # target_names maps cleaned name -> original name, in priority order
+        self.cleaned_names = list(target_names.keys())
+        self.original_names = list(target_names.values())
+        self.n = n
+        self.top_k = top_k
+        self.threshold = threshold
+
+        postings = defaultdict(list)
+        gram_counts = []
+        for i, name in enumerate(self.cleaned_names):
+            grams = name_ngrams(name, n)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings[gram].append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+        self.gram_counts = np.array(gram_counts, dtype=np.int64)
+        self.name_lengths = np.array([len(name) for name in self.cleaned_names], dtype=np.int64)
+        self.position = {name: i for i, name in enumerate(self.original_names)}
+
+    def candidates(self, cleaned_name, excluded=()):
+        """Return indices of the top-k targets for a cleaned name, in index order."""
+        grams = name_ngrams(cleaned_name, self.n)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return np.array([], dtype=np.int64)
+
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.cleaned_names))
+        # fuzz.ratio can never exceed 2 * shorter / (len_a + len_b)
+        max_ratio = 200 * np.minimum(self.name_lengths, len(cleaned_name)) / np.maximum(
+            self.name_lengths + len(cleaned_name), 1)
+        keep = (shared > 0) & (max_ratio > self.threshold)
+        for i in excluded:
+            keep[i] = False
+        ids = np.flatnonzero(keep)
+
+        dice = 2 * shared[ids] / (len(grams) + self.gram_counts[ids])
+        top = ids[np.argsort(-dice, kind='stable')[:self.top_k]]
+        return np.sort(top)
+
+    def match_many(self, queries, excluded_matches=EXCLUDED_MATCHES):
+        """Match (bid_name, cleaned_name) pairs in bulk.
+
+        Returns one dict per query with the best match, its score, the
+        runner-up and the number of candidates that were scored.
+        """
+        excluded_ids = defaultdict(set)
+        for bid_name, target in excluded_matches:
+            if target in self.position:
+                excluded_ids[bid_name].add(self.position[target])
+
+        # Gather all candidate pairs first, then verify them in one pass
+        candidate_lists = [
+            self.candidates(cleaned_name, excluded_ids.get(bid_name, ()))
+            for bid_name, cleaned_name in queries
+        ]
+        scores = [
+            [fuzz.ratio(cleaned_name, self.cleaned_names[i]) for i in ids]
+            for (_, cleaned_name), ids in zip(queries, candidate_lists)
+        ]
+
+        results = []
+        for ids, ratios in zip(candidate_lists, scores):
+            best_ratio, best_match = 0, None
+            runner_up_ratio, runner_up = 0, None
+            for i, ratio in zip(ids, ratios):
+                if ratio > best_ratio:
+                    if best_match is not None:
+                        runner_up_ratio, runner_up = best_ratio, best_match
+                    best_ratio, best_match = ratio, self.original_names[i]
+                elif ratio > runner_up_ratio:
+                    runner_up_ratio, runner_up = ratio, self.original_names[i]
+            if best_ratio <= self.threshold:
+                best_ratio, best_match = 0, None
+            results.append({
+                'fy20_name': best_match,
+                'score': best_ratio,
+                'runner_up': runner_up,
+                'runner_up_score': runner_up_ratio,
+                'candidates_scored': len(ids),
+            })
+        return results
+
+def build_match_table(bid_names, fy20_names, manual_matches=MANUAL_MATCHES,
+                      special_matches=SPECIAL_MATCHES, excluded_matches=EXCLUDED_MATCHES,
+                      threshold=60, top_k=10):
+    """Resolve every distinct BID name to an FY20 name once.
+
+    Names are resolved by special combined entries, then manual overrides,
+    then exact cleaned-name matches, then the n-gram fuzzy matcher. Returns a
+    match report indexed by BID name with the matched 'fy20_name', the match
+    'score', the 'method' used, the FY20 'sources' the match draws on and,
+    for fuzzy lookups, the runner-up and number of candidates scored.
+    """
+    fy20_names = list(fy20_names)
+    fy20_name_set = set(fy20_names)
+    fy20_cleaned_names = {clean_bid_name(name): name for name in fy20_names}
+
+    rows = []
+    fuzzy_queries = []
+    for bid_name in pd.unique(pd.Series(list(bid_names), dtype=object)):
+        cleaned_name = clean_bid_name(bid_name)
+        row = {'bid_name': bid_name, 'cleaned_name': cleaned_name, 'fy20_name': None,
+               'score': 0, 'method': 'unmatched', 'sources': [], 'runner_up': None,
+               'runner_up_score': 0, 'candidates_scored': 0}
+        rows.append(row)
+
+        if bid_name in special_matches:
+            row.update(fy20_name=bid_name, score=100, method='special',
+                       sources=list(special_matches[bid_name]))
+        elif bid_name in manual_matches and manual_matches[bid_name] in fy20_name_set:
+            matched_name = manual_matches[bid_name]
+            row.update(fy20_name=matched_name, score=100, method='manual', sources=[matched_name])
+        elif cleaned_name in fy20_cleaned_names:
+            matched_name = fy20_cleaned_names[cleaned_name]
+            row.update(fy20_name=matched_name, score=100, method='exact', sources=[matched_name])
+        else:
+            fuzzy_queries.append(row)
+
+    # Fall back to fuzzy matching for everything left, in one batch
+    if fuzzy_queries:
+        matcher = NGramMatcher(fy20_cleaned_names, top_k=top_k, threshold=threshold)
+        results = matcher.match_many(
+            [(row['bid_name'], row['cleaned_name']) for row in fuzzy_queries],
+            excluded_matches=excluded_matches
+        )
+        for row, result in zip(fuzzy_queries, results):
+            row.update(result)
+            if result['fy20_name'] is not None:
+                row.update(method='fuzzy', sources=[result['fy20_name']])
+
+    columns = ['bid_name', 'cleaned_name', 'fy20_name', 'score', 'method', 'sources',
+               'runner_up', 'runner_up_score', 'candidates_scored']
+    return pd.DataFrame(rows, columns=columns).set_index('bid_name')
+
+def unique_fy20_names(match_table):
+    """Return each BID's FY20 name, keeping every FY20 name only for its best-scoring BID.
+
+    Tables keyed by FY20 name (e.g. for the analysis plots) then never add
+    up two boundaries that a weak fuzzy match sent to the same FY20 entry.
+    """
+    matched = match_table.dropna(subset=['fy20_name']).sort_values('score', ascending=False, kind='stable')
+    best = matched[~matched['fy20_name'].duplicated()]
+    return best['fy20_name'].reindex(match_table.index)
+
+# Bins of the fuzzy score distribution in match summaries
+SCORE_BINS = [60, 70, 80, 90, 100]
+
+def match_summary(match_table, fy20_names):
+    """Summarize a match table for the run report.
+
+    Returns the number of BIDs per match method, the unmatched BID and FY20
+    names, and the distribution of fuzzy match scores.
+    """
+    matched_rows = match_table[match_table['method'] != 'unmatched']
+    matched_fy20_names = set(name for sources in matched_rows['sources'] for name in sources)
+    fuzzy_scores = match_table.loc[match_table['method'] == 'fuzzy', 'score']
+    bins = pd.cut(fuzzy_scores, SCORE_BINS).value_counts(sort=False)
+    return {
+        'bids': len(match_table),
+        'matched': len(matched_rows),
+        'methods': {method: int(count) for method, count in match_table['method'].value_counts().items()},
+        'unmatched_bids': sorted(match_table.index[match_table['method'] == 'unmatched']),
+        'unmatched_fy20': sorted(set(fy20_names) - matched_fy20_names),
+        'fuzzy_scores': {
+            'count': len(fuzzy_scores),
+            'min': int(fuzzy_scores.min()) if len(fuzzy_scores) else None,
+            'median': float(fuzzy_scores.median()) if len(fuzzy_scores) else None,
+            'histogram': {f'{interval.left:g}-{interval.right:g}': int(count) for interval, count in bins.items()},
+        },
+    }
@@ -0,0 +1,212 @@
+import argparse
+import os
+import pandas as pd
+from bid_matching import build_match_table, clean_bid_name, MANUAL_MATCHES
+from trends_store import normalize_column_name
+
+REGISTRY_CSV = 'BIDs/bid_registry.csv'
+BIDS_CSV = 'BIDs/NYC_BIDS_09112015_20250113.csv'
+FY20_CSV = 'BIDs/FY20_BID_Trends_Report_Data_20250110.csv'
+DIRECTORY_CSV = 'BIDs/Directory_Of_Business_Improvement_Districts_20250113.csv'
+
+# Boundary names whose Directory entry the matcher gets wrong
+DIRECTORY_MATCHES = {
+    'Flatiron/23rd Street Partnership': 'Flatiron NoMad Partnership',
+}
+
+REGISTRY_COLUMNS = ['bid_id', 'source', 'key', 'name', 'method', 'score']
+
+class BIDRegistry:
+    """Stable BID IDs linking boundaries, Directory entries and Trends Report names.
+
+    Each link is a (source, key) pair mapped to one bid_id: a boundary name
+    ('boundary'), a Directory org_id ('directory') or a Trends Report BID
+    name ('trends'). A BID can have several keys per source, e.g. a merged
+    BID that still reports as two Trends rows. Keys are matched once, when
+    first added; afterwards they are plain dictionary lookups.
+    """
+
+    def __init__(self, links=None):
+        self.links = pd.DataFrame(columns=REGISTRY_COLUMNS) if links is None else links
+        self.ids = {
+            (source, key): bid_id
+            for source, key, bid_id in zip(self.links['source'], self.links['key'], self.links['bid_id'])
+        }
+
+    @classmethod
+    def load(cls, path=REGISTRY_CSV):
+        if not os.path.exists(path):
+            return cls()
+        return cls(pd.read_csv(path, dtype={'key': str, 'name': str}, keep_default_na=False))
+
+    def save(self, path=REGISTRY_CSV):
+        self.links.to_csv(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+
+    def bid_ids(self, source, keys):
+        """Return the bid_id of every key (<NA> for unregistered keys)"""
+        return pd.Series([self.ids.get((source, str(key))) for key in keys], dtype='Int64')
+
+    def source_links(self, source):
+        return self.links[self.links['source'] == source]
+
+    def add_links(self, source, rows):
+        """Register (key, name, bid_id, method, score) rows; a bid_id of None starts a new BID"""
+        next_id = int(self.links['bid_id'].max()) + 1 if len(self.links) else 1
+        new_rows = []
+        for key, name, bid_id, method, score in rows:
+            if bid_id is None:
+                bid_id, next_id = next_id, next_id + 1
+            self.ids[(source, key)] = bid_id
+            new_rows.append({'bid_id': bid_id, 'source': source, 'key': key, 'name': name,
+                             'method': method, 'score': score})
+        if new_rows:
+            self.links = pd.concat([self.links, pd.DataFrame(new_rows, columns=REGISTRY_COLUMNS)],
+                                   ignore_index=True)
+        return len(new_rows)
+
+    def add_boundaries(self, names):
+        """Register new boundary names.
+
+        A new boundary joins a BID known only from the Directory or Trends
+        Reports when its name matches one of their names; otherwise it
+        starts a new BID.
+        """
+        new_names = [name for name in pd.unique(pd.Series(list(names), dtype=object))
+                     if ('boundary', name) not in self.ids]
+        if not new_names:
+            return 0
+
+        with_boundary = set(self.source_links('boundary')['bid_id'])
+        candidates = self.links[~self.links['bid_id'].isin(with_boundary) & (self.links['name'] != '')]
+        candidate_ids = dict(zip(candidates['name'], candidates['bid_id']))
+        claimed = {}
+        if candidate_ids:
+            match_table = build_match_table(new_names, list(candidate_ids))
+            matched = match_table[match_table['method'] != 'unmatched'].sort_values(
+                'score', ascending=False, kind='stable')
+            for name, row in matched.iterrows():
+                bid_id = candidate_ids[row['sources'][0]]
+                if bid_id not in claimed.values():
+                    claimed[name] = (bid_id, row['method'], row['score'])
+
+        return self.add_links('boundary', [
+            (name, name, *claimed.get(name, (None, 'new', 100))) for name in new_names
+        ])
+
+    def add_matched(self, source, keys, names, manual_matches=MANUAL_MATCHES):
+        """Register new Directory or Trends keys by matching their names to the boundary names.
+
+        Each name joins the BID of the boundary it matches best (special
+        combined entries, manual overrides, exact and fuzzy matches, as in
+        build_match_table). A name matched by several boundaries goes to the
+        highest-scoring one; unmatched names start new BIDs.
+        """
+        new = pd.DataFrame({'key': [str(key) for key in keys], 'name': list(names)})
+        new['name'] = new['name'].fillna('').astype(str)
+        new = new[~new['key'].map(lambda key: (source, key) in self.ids)].drop_duplicates('key')
+        if new.empty:
+            return 0
+
+        boundaries = self.source_links('boundary')
+        claims = {}
+        named = [name for name in pd.unique(new['name']) if name]
+        if len(boundaries) and named:
+            match_table = build_match_table(boundaries['key'], named, manual_matches=manual_matches)
+            boundary_ids = dict(zip(boundaries['key'], boundaries['bid_id']))
+            matched = match_table[match_table['method'] != 'unmatched'].sort_values(
+                'score', ascending=False, kind='stable')
+            for bid_name, row in matched.iterrows():
+                for name in row['sources']:
+                    claims.setdefault(name, (boundary_ids[bid_name], row['method'], row['score']))
+
+        return self.add_links(source, [
+            (key, name, *claims.get(name, (None, 'new', 100))) for key, name in zip(new['key'], new['name'])
+        ])
+
+    def update(self, boundary_names=(), directory=None, trends_names=()):
+        """Register any keys not seen before and return the number of new links"""
+        added = self.add_boundaries(boundary_names)
+        if directory is not None:
+            added += self.add_matched('directory', directory['org_id'], directory['org_name'],
+                                      {**MANUAL_MATCHES, **DIRECTORY_MATCHES})
+        added += self.add_matched('trends', trends_names, trends_names)
+        return added
+
+    def match_table(self, bid_names, fy20_names):
+        """Return build_match_table's report for these names, read from the registry.
+
+        Each boundary name gets the Trends names of its BID that appear in
+        `fy20_names`. A BID with several of them gets its own name as
+        'fy20_name', with the Trends names as 'sources' to be combined.
+        """
+        fy20_names = list(fy20_names)
+        trends = self.source_links('trends')
+        trends = trends[trends['key'].isin(set(fy20_names))]
+        trends_by_id = {bid_id: group for bid_id, group in trends.groupby('bid_id')}
+
+        rows = []
+        for bid_name in pd.unique(pd.Series(list(bid_names), dtype=object)):
+            row = {'bid_name': bid_name, 'cleaned_name': clean_bid_name(bid_name), 'fy20_name': None,
+                   'score': 0, 'method': 'unmatched', 'sources': [], 'runner_up': None,
+                   'runner_up_score': 0, 'candidates_scored': 0}
+            links = trends_by_id.get(self.ids.get(('boundary', bid_name)))
+            if links is not None:
+                sources = list(links['key'])
+                row.update(fy20_name=sources[0] if len(sources) == 1 else bid_name,
+                           score=int(links['score'].min()), method=links['method'].iloc[0], sources=sources)
+            rows.append(row)
+        columns = ['bid_name', 'cleaned_name', 'fy20_name', 'score', 'method', 'sources',
+                   'runner_up', 'runner_up_score', 'candidates_scored']
+        return pd.DataFrame(rows, columns=columns).set_index('bid_name')
+
+def combined_sources(match_table):
+    """Return the matches drawing on several FY20 rows, as merge_bids groups (name -> members)"""
+    return {name: sources for name, sources in match_table['sources'].items() if len(sources) > 1}
+
+def trends_names(path):
+    """Return the BID names of a Trends Report CSV, whatever its name column is called"""
+    columns = pd.read_csv(path, nrows=0).columns
+    name_column = next(column for column in columns if normalize_column_name(column) == 'bid_name')
+    return pd.read_csv(path, usecols=[name_column])[name_column].dropna()
+
+def load_registry(path=REGISTRY_CSV, bids_csv=BIDS_CSV, directory_csv=DIRECTORY_CSV, trends_csvs=(FY20_CSV,)):
+    """Load the registry, registering any new names in the given files.
+
+    The registry is saved again only when something was added, so runs on
+    known files only read it.
+    """
+    registry = BIDRegistry.load(path)
+    added = registry.update(
+        boundary_names=pd.read_csv(bids_csv, usecols=['F_ALL_BI_2'])['F_ALL_BI_2'],
+        directory=pd.read_csv(directory_csv, usecols=['org_id', 'org_name']) if directory_csv else None,
+        trends_names=pd.concat([trends_names(trends_csv) for trends_csv in trends_csvs]) if trends_csvs else (),
+    )
+    if added:
+        registry.save(path)
+    return registry, added
+
+def main():
+    parser = argparse.ArgumentParser(description='Register new BID names and show the registry')
+    parser.add_argument('--trends', nargs='+', default=[FY20_CSV], help='Trends Report CSVs to register')
+    parser.add_argument('--directory', default=DIRECTORY_CSV, help='BID Directory CSV')
+    parser.add_argument('--bids', default=BIDS_CSV, help='Boundary CSV')
+    parser.add_argument('--registry', default=REGISTRY_CSV, help='Registry CSV')
+    args = parser.parse_args()
+
+    registry, added = load_registry(args.registry, args.bids, args.directory, args.trends)
+    links = registry.links
+    print(f"{links['bid_id'].nunique()} BIDs, {len(links)} links ({added} new)")
+    for source in ['boundary', 'directory', 'trends']:
+        source_links = registry.source_links(source)
+        missing = links.loc[~links['bid_id'].isin(source_links['bid_id']), 'bid_id'].nunique()
+        print(f"  {source:<10} {len(source_links):>4} keys, {missing} BIDs without one")
+
+    unlinked = links.groupby('bid_id')['source'].nunique() == 1
+    if unlinked.any():
+        print("\nBIDs found in one source only:")
+        for _, row in links[links['bid_id'].isin(unlinked.index[unlinked])].iterrows():
+            print(f"  - {row['bid_id']:>3} {row['source']:<10} {row['name'] or row['key']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import numpy as np
+from branca.element import MacroElement
+from folium.template import Template
+
+def year_membership(years, first_year=None, last_year=None):
+    """Return which BIDs exist in each year, as an order array and per-year counts.
+
+    BIDs are sorted by founding year, so the BIDs existing in a year are the
+    first counts[year - first_year] entries of `order` (indices into
+    `years`). Two integer arrays cover every year, however many there are.
+    """
+    years = np.asarray(years, dtype=int)
+    first_year = int(years.min()) if first_year is None else first_year
+    last_year = int(years.max()) if last_year is None else last_year
+    order = np.argsort(years, kind='stable')
+    counts = np.searchsorted(years[order], np.arange(first_year, last_year + 1), side='right')
+    return order, counts, first_year, last_year
+
+class YearSlider(MacroElement):
+    """Year slider that shows only the BIDs founded by the selected year.
+
+    Added as a child of the GeoJson layer holding all BIDs, in the same
+    order as `years`. Moving the slider adds or removes only the BIDs
+    founded between the old and new year, so every boundary is loaded once
+    and scrubbing stays cheap. The play button steps through the years.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var layer = {{ this._parent.get_name() }};
+            var timeline = {{ this.timeline|tojson }};
+            var features = layer.getLayers();
+            var shown = features.length;
+            var control = L.control({position: 'bottomleft'});
+            control.onAdd = function() {
+                var div = L.DomUtil.create('div', 'leaflet-bar');
+                div.style.cssText = 'background: white; padding: 6px 10px; font: 13px sans-serif;';
+                div.innerHTML = '<button type="button" style="width: 28px;">&#9654;</button> '
+                    + '<input type="range" step="1" style="width: 260px; vertical-align: middle;"> '
+                    + '<span style="display: inline-block; width: 110px;"></span>';
+                L.DomEvent.disableClickPropagation(div);
+                L.DomEvent.disableScrollPropagation(div);
+                return div;
+            };
+            control.addTo(layer._map);
+
+            var container = control.getContainer();
+            var button = container.querySelector('button');
+            var slider = container.querySelector('input');
+            var label = container.querySelector('span');
+            slider.min = timeline.first_year;
+            slider.max = timeline.last_year;
+            slider.value = timeline.last_year;
+
+            function showYear(year) {
+                var count = timeline.counts[year - timeline.first_year];
+                while (shown < count) { layer.addLayer(features[timeline.order[shown++]]); }
+                while (shown > count) { layer.removeLayer(features[timeline.order[--shown]]); }
+                label.textContent = year + ': ' + count + (count === 1 ? ' BID' : ' BIDs');
+            }
+
+            // Redraw at most once per animation frame while dragging
+            var frame = null;
+            slider.addEventListener('input', function() {
+                if (frame === null) {
+                    frame = requestAnimationFrame(function() {
+                        frame = null;
+                        showYear(+slider.value);
+                    });
+                }
+            });
+
+            var timer = null;
+            button.addEventListener('click', function() {
+                if (timer !== null) {
+                    clearInterval(timer);
+                    timer = null;
+                    button.innerHTML = '&#9654;';
+                    return;
+                }
+                if (+slider.value >= timeline.last_year) {
+                    slider.value = timeline.first_year;
+                    showYear(timeline.first_year);
+                }
+                button.innerHTML = '&#10074;&#10074;';
+                timer = setInterval(function() {
+                    slider.value = +slider.value + 1;
+                    showYear(+slider.value);
+                    if (+slider.value >= timeline.last_year) { button.click(); }
+                }, {{ this.step_ms }});
+            });
+            showYear(timeline.last_year);
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, years, first_year=None, last_year=None, step_ms=400):
+        super().__init__()
+        self._name = 'YearSlider'
+        order, counts, first_year, last_year = year_membership(years, first_year, last_year)
+        self.timeline = {
+            'first_year': first_year,
+            'last_year': last_year,
+            'order': order.tolist(),
+            'counts': counts.tolist(),
+        }
+        self.step_ms = step_ms
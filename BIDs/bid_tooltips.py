@@ -0,0 +1,93 @@
+import pandas as pd
+from branca.element import MacroElement
+from folium.template import Template
+
+# Tooltip layout; {field} placeholders are filled from the formatted fields,
+# either in Python (render_tooltips) or in the browser (ClientTooltip)
+TOOLTIP_TEMPLATE = (
+    "<b>{bid_name}</b><br>"
+    "Founded: {year_found}<br>"
+    "<br>"
+    "<b>FY20 Data:</b><br>"
+    "Total Expenses: {expenses}<br>"
+    "Full-time Staff: {full_time_total}<br>"
+    "Trash Bags Collected: {trash_bags}<br>"
+    "Receptacles Serviced: {receptacles}<br>"
+    "Public Safety Interactions: {safety_interactions}<br>"
+    "Public Art Installations: {art_installations}"
+)
+
+# Format for each metric shown in the tooltip
+METRIC_FORMATS = {
+    'expenses': '${:,.2f}',
+    'full_time_total': '{:,}',
+    'trash_bags': '{:,}',
+    'receptacles': '{:,}',
+    'safety_interactions': '{:,}',
+    'art_installations': '{:,}',
+}
+
+def format_tooltip_fields(bid_names, years, metrics, matched):
+    """Format every tooltip field for all BIDs at once.
+
+    `metrics` holds one row of FY20 metrics per BID (aligned with
+    `bid_names`) and `matched` marks the BIDs that have FY20 data. Missing
+    counts show as '0' for matched BIDs, and every metric shows
+    'Not available' for unmatched ones.
+    """
+    index = pd.RangeIndex(len(bid_names))
+    matched = pd.Series(matched, index=index).astype(bool)
+    fields = pd.DataFrame({
+        'bid_name': list(bid_names),
+        'year_found': pd.Series(list(years), index=index).astype(int),
+    }, index=index)
+
+    for column, number_format in METRIC_FORMATS.items():
+        values = pd.Series(metrics[column].values, index=index)
+        if column != 'expenses':
+            values = values.dropna().astype('int64')
+        formatted = pd.Series('0', index=index)
+        formatted[values.index] = values.map(number_format.format)
+        formatted[~matched] = 'Not available'
+        fields[column] = formatted
+    return fields
+
+def add_tooltip_metrics(fields, metrics, labels, template=TOOLTIP_TEMPLATE):
+    """Add extra metric columns (aligned with `fields`) to the tooltip.
+
+    Returns the extended fields and template, with one line per metric
+    headed by its label. Missing values show as 'Not available'.
+    """
+    fields = fields.copy()
+    for column in metrics.columns:
+        values = pd.Series(metrics[column].values, index=fields.index)
+        fields[column] = values.map('{:,.0f}'.format).where(values.notna(), 'Not available')
+        template += f"<br>{labels[column]}: {{{column}}}"
+    return fields, template
+
+def render_tooltips(fields, template=TOOLTIP_TEMPLATE):
+    """Render the tooltip HTML for every row of `fields` in one batch."""
+    return [template.format_map(record) for record in fields.to_dict('records')]
+
+class ClientTooltip(MacroElement):
+    """Bind tooltips to a GeoJson layer, rendered in the browser from feature properties.
+
+    The template is embedded once, so the tooltip HTML is not repeated for
+    every BID in the saved map.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        {{ this._parent.get_name() }}.eachLayer(function(layer) {
+            var properties = layer.feature.properties;
+            layer.bindTooltip({{ this.template|tojson }}.replace(/\\{(\\w+)\\}/g, function(match, field) {
+                return properties[field];
+            }), {sticky: true});
+        });
+        {% endmacro %}
+    """)
+
+    def __init__(self, template=TOOLTIP_TEMPLATE):
+        super().__init__()
+        self._name = 'ClientTooltip'
+        self.template = template
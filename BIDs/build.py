@@ -0,0 +1,209 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+from hashing import file_hash
+
+# Everything runs relative to the repository root, wherever we are called from
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_FILE = '.build_state.json'
+
+BIDS_CSV = 'BIDs/NYC_BIDS_09112015_20250113.csv'
+FY20_CSV = 'BIDs/FY20_BID_Trends_Report_Data_20250110.csv'
+POINT_METRICS_CSV = 'BIDs/point_metrics.csv'
+GEOMETRY_METRICS_CSV = 'BIDs/bid_geometry_metrics.csv'
+DIRECTORY_CSV = 'BIDs/Directory_Of_Business_Improvement_Districts_20250113.csv'
+REGISTRY_CSV = 'BIDs/bid_registry.csv'
+
+PLOT_FILES = [
+    'bid_expenses_vs_linear_foot.html',
+    'cost_per_foot_distribution.html',
+    'cost_per_foot_detailed.html',
+    'expense_distribution.html',
+    'expense_averages.html',
+    'expense_by_founding_decade.html',
+    'total_expenses_100k.html',
+    'total_expenses_1m.html',
+    'cost_per_square_foot.html',
+    'cost_per_perimeter_foot.html',
+]
+
+def copy_map_to_index():
+    shutil.copyfile('BIDs/nyc_bids_map.html', 'index.html')
+
+# Each target lists its outputs, the files it is built from, the targets it
+# depends on and the command (argv list or Python function) that builds it.
+# Targets sharing a command are all rebuilt by a single run of it.
+TARGETS = {
+    'map': {
+        'outputs': ['BIDs/nyc_bids_map.html', GEOMETRY_METRICS_CSV, REGISTRY_CSV],
+        # The registry is also an input: a hand-fixed link must rebuild the map
+        'inputs': [BIDS_CSV, FY20_CSV, DIRECTORY_CSV, POINT_METRICS_CSV, REGISTRY_CSV],
+        'scripts': ['BIDs/BIDs_map.py'],
+        'command': [sys.executable, 'BIDs/BIDs_map.py'],
+    },
+    'index': {
+        'outputs': ['index.html'],
+        'inputs': ['BIDs/nyc_bids_map.html'],
+        'depends': ['map'],
+        'command': copy_map_to_index,
+    },
+}
+for plot_file in PLOT_FILES:
+    TARGETS[f'plots/{plot_file[:-5]}'] = {
+        'outputs': [f'plots/{plot_file}'],
+        'inputs': [FY20_CSV, POINT_METRICS_CSV, GEOMETRY_METRICS_CSV, 'plots/template.html'],
+        # The map writes the boundary measurements the plots read
+        'depends': ['map'],
+        'scripts': ['BIDs/BIDs_analysis.py'],
+        'command': [sys.executable, 'BIDs/BIDs_analysis.py'],
+    }
+    # The same plot as a JSON payload for plots/viewer.html
+    TARGETS[f'viewer/{plot_file[:-5]}'] = {
+        'outputs': [f'plots/data/{plot_file[:-5]}.json', 'plots/data/templates/plotly_white.json',
+                    'plots/vendor/plotly.min.js'],
+        'inputs': [FY20_CSV, POINT_METRICS_CSV, GEOMETRY_METRICS_CSV],
+        'depends': ['map'],
+        'scripts': ['BIDs/BIDs_analysis.py'],
+        'command': [sys.executable, 'BIDs/BIDs_analysis.py', '--output', 'json',
+                    '--report', 'BIDs/.reports/BIDs_analysis_json.json'],
+    }
+
+def local_modules(script):
+    """Return the script and every module next to it that it imports, recursively."""
+    directory = os.path.dirname(script)
+    found = []
+    pending = [script]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.append(path)
+        with open(path) as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                candidate = os.path.join(directory, name.split('.')[0] + '.py')
+                if os.path.exists(candidate):
+                    pending.append(candidate)
+    return sorted(found)
+
+def target_signature(name):
+    """Hash the target's input files, code and command into one signature."""
+    target = TARGETS[name]
+    files = list(target['inputs'])
+    for script in target.get('scripts', []):
+        files += local_modules(script)
+
+    command = target['command']
+    command_id = command.__name__ if callable(command) else ' '.join(command[1:])
+    digest = hashlib.sha256(command_id.encode())
+    for path in sorted(set(files)):
+        digest.update(path.encode())
+        digest.update(file_hash(path).encode() if os.path.exists(path) else b'missing')
+    return digest.hexdigest()
+
+def build_order(names):
+    """Return the requested targets and their dependencies, dependencies first."""
+    order = []
+
+    def visit(name):
+        if name in order:
+            return
+        for dependency in TARGETS[name].get('depends', []):
+            visit(dependency)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
+
+def load_state():
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    return {}
+
+def is_stale(name, state):
+    target = TARGETS[name]
+    if not all(os.path.exists(output) for output in target['outputs']):
+        return True
+    return state.get(name) != target_signature(name)
+
+def build(names, force=False, dry_run=False):
+    """Rebuild the stale targets among `names` (and their dependencies)."""
+    state = load_state()
+    completed_commands = []
+    rebuilt = []
+
+    for name in build_order(names):
+        target = TARGETS[name]
+        # Signatures are computed now, after dependencies have been rebuilt
+        if not force and not is_stale(name, state):
+            print(f"  up to date: {name}")
+            continue
+
+        command = target['command']
+        if command not in completed_commands:
+            print(f"  building:   {name}")
+            if not dry_run:
+                if callable(command):
+                    command()
+                elif subprocess.run(command).returncode != 0:
+                    raise SystemExit(f"Building {name} failed")
+            completed_commands.append(command)
+        else:
+            print(f"  built with: {name}")
+        rebuilt.append(name)
+        if not dry_run:
+            state[name] = target_signature(name)
+            with open(STATE_FILE, 'w') as f:
+                json.dump(state, f, indent=2, sort_keys=True)
+
+    print(f"\n{len(rebuilt)} of {len(build_order(names))} targets rebuilt")
+    return rebuilt
+
+def select_targets(patterns):
+    """Expand target names; 'plots' selects every plot target."""
+    if not patterns:
+        return list(TARGETS)
+    names = []
+    for pattern in patterns:
+        matches = [name for name in TARGETS if name == pattern or name.startswith(pattern.rstrip('/') + '/')]
+        if not matches:
+            raise SystemExit(f"Unknown target: {pattern} (choose from {', '.join(TARGETS)})")
+        names += matches
+    return names
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the NYC BIDs map and plots, rebuilding only what changed')
+    subparsers = parser.add_subparsers(dest='action', required=True)
+    build_parser = subparsers.add_parser('build', help='Rebuild stale targets')
+    build_parser.add_argument('targets', nargs='*', help='Targets to build (default: all)')
+    build_parser.add_argument('--force', action='store_true', help='Rebuild even if up to date')
+    build_parser.add_argument('--dry-run', action='store_true', help='Only show what would be rebuilt')
+    status_parser = subparsers.add_parser('status', help='Show which targets are stale')
+    status_parser.add_argument('targets', nargs='*', help='Targets to check (default: all)')
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    names = select_targets(args.targets)
+    if args.action == 'status':
+        state = load_state()
+        for name in build_order(names):
+            print(f"  {'stale' if is_stale(name, state) else 'ok':<6} {name}")
+    else:
+        build(names, force=args.force, dry_run=args.dry_run)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from bid_lookup import BIDLookup
+from bid_matching import unique_fy20_names
+from bid_registry import load_registry
+from trends_data import POINT_METRICS_CSV, BID_NAME_COLUMNS
+from trends_store import normalize_column_name
+
+FY20_CSV = 'BIDs/FY20_BID_Trends_Report_Data_20250110.csv'
+
+# Rows read from a point file at a time; memory use depends on this, not the file size
+CHUNK_ROWS = 250_000
+
+def read_point_chunks(path, columns, chunk_rows=CHUNK_ROWS):
+    """Yield DataFrames holding only `columns` of a CSV or Parquet file, `chunk_rows` rows at a time"""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows)
+
+def join_points(path, bid_lookup, lat_column, lon_column, sum_columns=(), chunk_rows=CHUNK_ROWS):
+    """Count the points of a file that fall in each BID and sum `sum_columns` over them.
+
+    The file is streamed in chunks and only per-BID running totals are kept.
+    Returns a DataFrame indexed by BID name with a 'count' column and one
+    '<column>_sum' column per summed column, plus the number of points read,
+    outside every BID and without valid coordinates.
+    """
+    bid_count = len(bid_lookup.names)
+    counts = np.zeros(bid_count, dtype=np.int64)
+    sums = {column: np.zeros(bid_count) for column in sum_columns}
+    stats = {'points': 0, 'outside': 0, 'invalid': 0}
+
+    for chunk in read_point_chunks(path, [lat_column, lon_column, *sum_columns], chunk_rows):
+        lats = pd.to_numeric(chunk[lat_column], errors='coerce').to_numpy(dtype=float)
+        lons = pd.to_numeric(chunk[lon_column], errors='coerce').to_numpy(dtype=float)
+        valid = np.isfinite(lats) & np.isfinite(lons)
+
+        indices = np.full(len(chunk), -1, dtype=np.int64)
+        indices[valid] = bid_lookup.lookup(lons[valid], lats[valid])
+        inside = indices >= 0
+        counts += np.bincount(indices[inside], minlength=bid_count)
+        for column in sum_columns:
+            values = pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype=float)
+            keep = inside & np.isfinite(values)
+            sums[column] += np.bincount(indices[keep], weights=values[keep], minlength=bid_count)
+
+        stats['points'] += len(chunk)
+        stats['invalid'] += int((~valid).sum())
+        stats['outside'] += int((valid & ~inside).sum())
+
+    results = pd.DataFrame({'count': counts}, index=pd.Index(bid_lookup.names, name='bid_name'))
+    for column in sum_columns:
+        results[f'{column}_sum'] = sums[column]
+    return results, stats
+
+def dataset_columns(columns, name):
+    """Return the point metric columns written by dataset `name`: '<name>_count' and its '<name>_..._sum' columns.
+
+    Every dataset writes a '<dataset>_count' column, so columns of other
+    datasets whose names start with `name` (e.g. 'calls_311_fee_sum' of
+    'calls_311' when `name` is 'calls') are recognized and left alone.
+    """
+    prefix = normalize_column_name(name) + '_'
+    longer_prefixes = [
+        column[:-len('count')] for column in columns
+        if column.endswith('_count') and column.startswith(prefix) and column != prefix + 'count'
+    ]
+    return [
+        column for column in columns
+        if column.startswith(prefix) and column not in BID_NAME_COLUMNS
+        and (column == prefix + 'count' or column.endswith('_sum'))
+        and not any(column.startswith(longer) for longer in longer_prefixes)
+    ]
+
+def update_point_metrics(name, results, fy20_names, path=POINT_METRICS_CSV):
+    """Store a dataset's per-BID results as '<name>_...' columns, replacing any earlier run of it"""
+    columns = results.rename(columns=lambda column: normalize_column_name(f'{name}_{column}'))
+    if os.path.exists(path):
+        point_metrics = pd.read_csv(path).set_index('bid_name')
+        point_metrics = point_metrics.drop(columns=dataset_columns(point_metrics.columns, name))
+    else:
+        point_metrics = pd.DataFrame(index=results.index)
+    point_metrics = point_metrics.reindex(results.index.union(point_metrics.index))
+    point_metrics['fy20_name'] = fy20_names.reindex(point_metrics.index)
+    point_metrics = point_metrics.join(columns)
+
+    point_metrics.to_csv(path + '.tmp')
+    os.replace(path + '.tmp', path)
+    return point_metrics
+
+def main():
+    parser = argparse.ArgumentParser(description='Join a point dataset to the BIDs and store per-BID counts and sums')
+    parser.add_argument('path', help='CSV or Parquet file with one row per point')
+    parser.add_argument('--name', required=True, help='Dataset name used as the metric prefix, e.g. complaints')
+    parser.add_argument('--lat-column', default='Latitude', help='Latitude column')
+    parser.add_argument('--lon-column', default='Longitude', help='Longitude column')
+    parser.add_argument('--sum', nargs='*', default=[], dest='sum_columns',
+                        help='Numeric columns to sum per BID')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Rows read at a time')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    bid_lookup = BIDLookup.from_csv()
+    results, stats = join_points(args.path, bid_lookup, args.lat_column, args.lon_column,
+                                 args.sum_columns, args.chunk_rows)
+    elapsed = time.perf_counter() - start
+
+    # FY20 names let the analysis plots pick the metrics up
+    fy20_names = pd.read_csv(FY20_CSV, usecols=['BID Name:'])['BID Name:']
+    registry, _ = load_registry()
+    match_table = registry.match_table(bid_lookup.names, fy20_names)
+    update_point_metrics(args.name, results, unique_fy20_names(match_table))
+
+    print(f"Joined {stats['points']:,} points in {elapsed:.1f}s "
+          f"({stats['points'] / max(elapsed, 1e-9):,.0f} points/s)")
+    print(f"  in a BID: {stats['points'] - stats['outside'] - stats['invalid']:,}  "
+          f"outside all BIDs: {stats['outside']:,}  invalid coordinates: {stats['invalid']:,}")
+    print(f"Updated {POINT_METRICS_CSV}")
+
+if __name__ == '__main__':
+    main()
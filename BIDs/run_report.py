@@ -0,0 +1,135 @@
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Where the scripts write their run reports by default
+REPORT_DIR = 'BIDs/.reports'
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+def add_report_arguments(parser, script):
+    """Add the --report, --profile and --trace-memory options to a script's parser"""
+    parser.add_argument('--report', default=os.path.join(REPORT_DIR, f'{script}.json'),
+                        help='Write the JSON run report to this file (default: %(default)s)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile the run with cProfile; the stats are saved next to the report')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Record Python memory allocations per stage with tracemalloc (slower)')
+
+class RunReport:
+    """Timers, counters and memory snapshots for the stages of one script run.
+
+    Stages run one after another: `stage(name)` ends the current stage and
+    starts the next. Each stage records its duration and the peak resident
+    memory after it, plus the current and peak traced Python memory when
+    `trace_memory` is on. `save()` ends the last stage and writes everything
+    as JSON.
+    """
+
+    def __init__(self, script, profile=False, trace_memory=False):
+        self.script = script
+        self.started = datetime.now(timezone.utc)
+        self.stages = {}
+        self.counters = {}
+        self.outputs = {}
+        self.details = {}
+        self.current = None
+        self.stage_start = None
+        self.trace_memory = trace_memory
+        if trace_memory:
+            tracemalloc.start()
+        self.profiler = cProfile.Profile() if profile else None
+        if self.profiler:
+            self.profiler.enable()
+
+    @classmethod
+    def from_args(cls, script, args):
+        return cls(script, profile=args.profile, trace_memory=args.trace_memory)
+
+    def stage(self, name):
+        """End the current stage, if any, and start timing `name`"""
+        self.end_stage()
+        self.current = name
+        self.stage_start = time.perf_counter()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+
+    def end_stage(self):
+        if self.current is None:
+            return
+        entry = {
+            'seconds': round(time.perf_counter() - self.stage_start, 4),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+        }
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            entry['traced_mb'] = round(current / 2 ** 20, 2)
+            entry['traced_peak_mb'] = round(peak / 2 ** 20, 2)
+        self.stages[self.current] = entry
+        self.current = None
+
+    def count(self, name, value=1):
+        """Add `value` to a counter"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def record(self, key, value):
+        """Store any JSON-serializable detail, e.g. a match summary"""
+        self.details[key] = value
+
+    def add_output(self, path):
+        """Record the size of a file the script wrote"""
+        if os.path.isdir(path):
+            size = sum(os.path.getsize(os.path.join(directory, name))
+                       for directory, _, names in os.walk(path) for name in names)
+        else:
+            size = os.path.getsize(path)
+        self.outputs[path] = size
+
+    def profile_summary(self, stats_path, limit=25):
+        """Stop profiling, save the stats and return the slowest functions by cumulative time"""
+        self.profiler.disable()
+        self.profiler.dump_stats(stats_path)
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        rows = []
+        for (filename, line, function), (_, calls, _, cumulative, _) in stats.stats.items():
+            rows.append({'function': f'{os.path.basename(filename)}:{line}({function})',
+                         'calls': calls, 'cumulative_seconds': round(cumulative, 4)})
+        return sorted(rows, key=lambda row: row['cumulative_seconds'], reverse=True)[:limit]
+
+    def save(self, path):
+        """End the current stage and write the report to `path`; returns the report"""
+        self.end_stage()
+        report = {
+            'script': self.script,
+            'started': self.started.isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'total_seconds': round(sum(entry['seconds'] for entry in self.stages.values()), 4),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'stages': self.stages,
+            'counters': self.counters,
+            'outputs': self.outputs,
+            **self.details,
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if self.profiler:
+            stats_path = os.path.splitext(path)[0] + '.prof'
+            report['profile'] = {'stats_file': stats_path, 'top_functions': self.profile_summary(stats_path)}
+        if self.trace_memory:
+            tracemalloc.stop()
+
+        with open(path + '.tmp', 'w') as f:
+            json.dump(report, f, indent=2)
+        os.replace(path + '.tmp', path)
+        return report
@@ -0,0 +1,193 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+import shapely
+
+BIDS_CSV = 'BIDs/NYC_BIDS_09112015_20250113.csv'
+FY20_CSV = 'BIDs/FY20_BID_Trends_Report_Data_20250110.csv'
+DIRECTORY_CSV = 'BIDs/Directory_Of_Business_Improvement_Districts_20250113.csv'
+
+# Area the synthetic BIDs are spread over (lon/lat)
+BOUNDS = (-74.25, 40.5, -73.7, 40.92)
+
+BOROUGHS = {
+    'MN': 'Manhattan',
+    'BK': 'Brooklyn',
+    'QN': 'Queens',
+    'BX': 'Bronx',
+    'SI': 'Staten Island',
+}
+
+STREETS = [
+    'Fulton', 'Atlantic', 'Church', 'Flatbush', 'Jamaica', 'Steinway', 'Myrtle', 'Graham', 'Fordham',
+    'Lexington', 'Madison', 'Broadway', 'Court', 'Montague', 'Pitkin', 'Sutphin', 'Liberty', 'Bay Ridge',
+    'Hudson', 'Canal', 'Delancey', 'Westchester', 'Jerome', 'Victory', 'Forest', 'Richmond', 'Union',
+]
+STREET_TYPES = ['Street', 'Avenue', 'Boulevard', 'Road', 'Square', 'Plaza']
+ORGANIZATION_TYPES = ['', ' Partnership', ' Alliance', ' BID', ' Business Improvement District',
+                      ' Merchants Association', ' District Management Association']
+
+# Spelling variants used to add noise to names
+ABBREVIATIONS = {'Street': 'St', 'Avenue': 'Ave', 'Boulevard': 'Blvd', 'Road': 'Rd',
+                 'Business Improvement District': 'BID', 'Partnership': 'Partners'}
+
+# Share of BIDs that appear only in the boundary file, and only in the FY20 file
+UNMATCHED_SHARE = 0.04
+
+def bid_names(count, rng):
+    """Return `count` distinct BID names such as '23rd Street Partnership' or 'Fulton Avenue BID'"""
+    names = []
+    seen = set()
+    while len(names) < count:
+        if rng.random() < 0.4:
+            number = int(rng.integers(1, 250))
+            suffix = 'th' if 10 <= number % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(number % 10, 'th')
+            street = f'{number}{suffix}'
+        else:
+            street = STREETS[rng.integers(len(STREETS))]
+        name = f'{street} {STREET_TYPES[rng.integers(len(STREET_TYPES))]}' \
+               f'{ORGANIZATION_TYPES[rng.integers(len(ORGANIZATION_TYPES))]}'
+        # Repeated names get a neighbourhood-style qualifier
+        if name in seen:
+            name = f'{name} {["North", "South", "East", "West", "Central"][len(names) % 5]} {len(names)}'
+        seen.add(name)
+        names.append(name)
+    return names
+
+def add_name_noise(name, rng):
+    """Return a spelling variant of a name: an abbreviation, dropped word, typo or added article"""
+    change = rng.integers(4)
+    words = name.split(' ')
+    if change == 0:
+        for full, short in ABBREVIATIONS.items():
+            if full in name:
+                return name.replace(full, short, 1)
+        return 'The ' + name
+    if change == 1 and len(words) > 2:
+        return ' '.join(words[:-1])
+    if change == 2 and len(name) > 4:
+        i = int(rng.integers(1, len(name) - 2))
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    return 'The ' + name
+
+def noisy_names(names, noise, rng):
+    """Apply add_name_noise to a `noise` share of the names"""
+    return [add_name_noise(name, rng) if rng.random() < noise else name for name in names]
+
+def bid_geometries(count, vertices, rng):
+    """Return `count` non-overlapping multipolygons of `vertices` vertices each.
+
+    BIDs are laid out on a grid over BOUNDS; each is an irregular ring around
+    its cell centre, with a wobbly radius so the shapes are not all alike.
+    """
+    columns = int(np.ceil(np.sqrt(count)))
+    rows = int(np.ceil(count / columns))
+    cell_width = (BOUNDS[2] - BOUNDS[0]) / columns
+    cell_height = (BOUNDS[3] - BOUNDS[1]) / rows
+    cells = np.arange(count)
+    centre_x = BOUNDS[0] + (cells % columns + 0.5) * cell_width
+    centre_y = BOUNDS[1] + (cells // columns + 0.5) * cell_height
+
+    angles = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    phases = rng.uniform(0, 2 * np.pi, (count, 3))
+    wobble = (0.25 * np.sin(2 * angles + phases[:, [0]])
+              + 0.15 * np.sin(5 * angles + phases[:, [1]])
+              + 0.05 * np.sin(11 * angles + phases[:, [2]]))
+    radius = 0.4 * (0.5 + 0.5 * rng.random((count, 1))) * (1 + wobble) / 1.45
+    x = centre_x[:, None] + radius * cell_width * np.cos(angles)
+    y = centre_y[:, None] + radius * cell_height * np.sin(angles)
+
+    rings = np.stack([x, y], axis=-1)
+    rings = np.concatenate([rings, rings[:, :1]], axis=1)
+    return shapely.multipolygons(shapely.polygons(rings), indices=cells)
+
+def generate(bid_count, directory, vertices=800, name_noise=0.2, seed=0):
+    """Write synthetic versions of the boundary, FY20 Trends and Directory CSVs.
+
+    The files have the same columns as the bundled ones. FY20 and Directory
+    rows are resampled from the bundled files, so their value formats match.
+    Names in the FY20 and Directory files are noisy variants of the
+    boundary names, and a few BIDs appear in only one file. Returns the
+    paths of the three CSVs; the same arguments always give the same files.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    names = bid_names(bid_count, rng)
+    borough_codes = rng.choice(list(BOROUGHS), size=bid_count, p=[0.35, 0.25, 0.22, 0.12, 0.06])
+    years = rng.integers(1976, 2024, size=bid_count)
+    unmatched = max(1, int(round(bid_count * UNMATCHED_SHARE)))
+    boundary_only = np.zeros(bid_count, dtype=bool)
+    boundary_only[rng.choice(bid_count, size=unmatched, replace=False)] = True
+
+    # Boundary file
+    template = pd.read_csv(BIDS_CSV, nrows=1, usecols=lambda column: column != 'the_geom')
+    ids = np.arange(bid_count)
+    bids = pd.DataFrame({
+        'the_geom': shapely.to_wkt(bid_geometries(bid_count, vertices, rng), rounding_precision=12),
+        'Id': 0,
+        'OBJECTID_1': ids,
+        'OBJECTID_2': ids,
+        'Shape_Leng': 0.0,
+        'F_ALL_BIDs': 0,
+        'F_ALL_BI_1': [BOROUGHS[code] for code in borough_codes],
+        'F_ALL_BI_2': names,
+        'F_ALL_BI_3': rng.integers(0, 2000, size=bid_count),
+        'F_ALL_BI_4': [f'https://www.bid{i}.org/' for i in ids],
+        'F_ALL_BI_6': rng.integers(0, 5_000_000, size=bid_count),
+        'F_ALL_BI_7': rng.integers(0, 5_000_000, size=bid_count),
+        'Shape_Le_1': 0.0,
+        'Shape_Ar_1': 0.0,
+        'Year_Found': years,
+        'Shape_Area': 0.0,
+    })[['the_geom', *template.columns]]
+
+    # FY20 Trends file: resampled rows for the BIDs that report, plus a few extras
+    fy20_template = pd.read_csv(FY20_CSV, dtype=str, keep_default_na=False)
+    reporting = np.flatnonzero(~boundary_only)
+    extra_names = [f'{name} Extension' for name in bid_names(unmatched, rng)]
+    fy20 = fy20_template.iloc[rng.integers(len(fy20_template), size=len(reporting) + unmatched)].reset_index(drop=True)
+    fy20_names = noisy_names([names[i] for i in reporting], name_noise, rng)
+    fy20['BID Name:'] = fy20_names + extra_names
+    fy20['Borough'] = list(borough_codes[reporting]) + list(rng.choice(list(BOROUGHS), size=unmatched))
+
+    # Directory file
+    directory_template = pd.read_csv(DIRECTORY_CSV, dtype=str, keep_default_na=False)
+    directory_rows = directory_template.iloc[rng.integers(len(directory_template), size=bid_count)].reset_index(drop=True)
+    directory_rows['org_id'] = ids + 1
+    directory_rows['org_name'] = noisy_names(names, name_noise, rng)
+    directory_rows['boro_id'] = [BOROUGHS[code] for code in borough_codes]
+    directory_rows['org_year'] = years.astype(str)
+
+    paths = {
+        'bids': os.path.join(directory, os.path.basename(BIDS_CSV)),
+        'fy20': os.path.join(directory, os.path.basename(FY20_CSV)),
+        'directory': os.path.join(directory, os.path.basename(DIRECTORY_CSV)),
+        'matches': os.path.join(directory, 'expected_matches.csv'),
+    }
+    bids.to_csv(paths['bids'], index=False)
+    fy20.to_csv(paths['fy20'], index=False)
+    directory_rows.to_csv(paths['directory'], index=False)
+
+    expected = pd.Series(None, index=pd.Index(names, name='bid_name'), name='fy20_name', dtype=object)
+    expected.iloc[reporting] = fy20_names
+    expected.to_csv(paths['matches'])
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic BID boundary, FY20 Trends and Directory CSVs')
+    parser.add_argument('directory', help='Directory to write the CSVs to')
+    parser.add_argument('--bids', type=int, default=760, help='Number of BIDs')
+    parser.add_argument('--vertices', type=int, default=800, help='Vertices per BID boundary')
+    parser.add_argument('--name-noise', type=float, default=0.2,
+                        help='Share of FY20 and Directory names that are spelled differently')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    paths = generate(args.bids, args.directory, args.vertices, args.name_noise, args.seed)
+    for path in paths.values():
+        print(f"  {os.path.getsize(path):>12,} bytes  {path}")
+
+if __name__ == '__main__':
+    main()
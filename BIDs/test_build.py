@@ -0,0 +1,31 @@
+import os
+import build
+
+def test_map_rebuilds_when_registry_is_edited(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    map_target = build.TARGETS['map']
+    for path in map_target['inputs']:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write('bid_id,name\n1,Example\n')
+
+    runs = []
+
+    def build_map():
+        runs.append(1)
+        for path in map_target['outputs']:
+            if path != build.REGISTRY_CSV:
+                with open(path, 'w') as f:
+                    f.write('built\n')
+
+    # The map's own scripts are not hashed here, only its input files
+    monkeypatch.setitem(build.TARGETS, 'map', {**map_target, 'scripts': [], 'command': build_map})
+
+    assert build.build(['map']) == ['map']
+    assert build.build(['map']) == []
+
+    # Fixing a link by hand, as the README describes
+    with open(build.REGISTRY_CSV, 'a') as f:
+        f.write('2,Example\n')
+    assert build.build(['map']) == ['map']
+    assert len(runs) == 2
@@ -0,0 +1,124 @@
+import os
+import pandas as pd
+
+# Trends Report metric columns and the short names used in the map
+METRIC_COLUMNS = {
+    'Total expenses': 'expenses',
+    'Full-time staff': 'full_time_staff',
+    'Sanitation staff employed': 'sanitation_staff',
+    'Public Safety staff employed': 'safety_staff',
+    'Trash bags collected': 'trash_bags',
+    'Trash and recycling receptacles serviced': 'receptacles',
+    'Interactions with public safety officers': 'safety_interactions',
+    'Public art installations sponsored': 'art_installations',
+}
+
+# Staff columns that make up the full-time total
+STAFF_COLUMNS = ['full_time_staff', 'sanitation_staff', 'safety_staff']
+
+# Column kinds in a Trends Report schema (column -> kind) for load_trends_data:
+# 'name' keeps text as is, 'category' stores repeated labels (e.g. Borough)
+# once, and 'number' parses numbers into the smallest exact type
+NAME, CATEGORY, NUMBER = 'name', 'category', 'number'
+
+# Trends Report columns the map reads
+MAP_SCHEMA = {'BID Name:': NAME, **{column: NUMBER for column in METRIC_COLUMNS}}
+
+# Accounting-style zeros written by some BIDs
+ZERO_VALUES = {'-', '$-', '$ -'}
+
+# Per-BID metric tables keyed by boundary and FY20 name: metrics aggregated
+# from point datasets by point_join.py, and boundary measurements written
+# by BIDs_map.py
+POINT_METRICS_CSV = 'BIDs/point_metrics.csv'
+GEOMETRY_METRICS_CSV = 'BIDs/bid_geometry_metrics.csv'
+BID_NAME_COLUMNS = ['bid_name', 'fy20_name']
+
+def load_metrics(trends_data, name_column='BID Name:'):
+    """Return the Trends Report metrics as a numeric DataFrame indexed by BID name.
+
+    All metric columns are coerced in one pass; values that are not numbers
+    become NaN. 'full_time_total' adds the staff columns, ignoring missing
+    values, and is NaN when the BID reports no staff at all.
+    """
+    metrics = trends_data[list(METRIC_COLUMNS)].apply(pd.to_numeric, errors='coerce')
+    metrics = metrics.rename(columns=METRIC_COLUMNS)
+    metrics.index = pd.Index(trends_data[name_column], name='bid_name')
+    metrics = metrics[~metrics.index.duplicated(keep='last')]
+
+    staff_total = metrics[STAFF_COLUMNS].sum(axis=1, min_count=1)
+    metrics['full_time_total'] = staff_total.where(staff_total > 0)
+    return metrics
+
+def merge_bids(metrics, groups):
+    """Append one combined row per entry of `groups` (name -> member BID names).
+
+    Each metric is the sum over the members, ignoring missing values, and
+    stays NaN only when no member reports it (or none is in `metrics`).
+    """
+    merged = pd.DataFrame(
+        [metrics.reindex(members).sum(min_count=1) for members in groups.values()],
+        index=pd.Index(list(groups.keys()), name=metrics.index.name)
+    )
+    return pd.concat([metrics, merged])
+
+def parse_numbers(values):
+    """Parse text like '9,840', '$487,088' or '12%' as numbers; anything else becomes NaN"""
+    text = values.astype('string').str.strip()
+    text = text.mask(text.isin(ZERO_VALUES), '0')
+    return pd.to_numeric(text.str.replace(r'[$,%\s]', '', regex=True), errors='coerce')
+
+def compact_numbers(values):
+    """Store whole numbers without gaps in the smallest integer type, everything else as float64"""
+    values = pd.to_numeric(values, errors='coerce')
+    if values.notna().all() and (values % 1 == 0).all():
+        return pd.to_numeric(values.astype('int64'), downcast='integer')
+    return values.astype('float64')
+
+def load_trends_data(path, schema):
+    """Read only the `schema` columns of a Trends Report CSV, in compact types.
+
+    Thousands separators are parsed while reading. Number columns that still
+    hold text (e.g. '$-' or free-text answers) go through parse_numbers.
+    Missing schema columns raise a ValueError naming them.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    missing = [column for column in schema if column not in header]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+
+    trends_data = pd.read_csv(
+        path,
+        usecols=list(schema),
+        thousands=',',
+        dtype={column: 'category' if kind == CATEGORY else object
+               for column, kind in schema.items() if kind != NUMBER},
+    )
+    for column, kind in schema.items():
+        if kind == NUMBER:
+            values = trends_data[column]
+            if values.dtype == object:
+                values = parse_numbers(values)
+            trends_data[column] = compact_numbers(values)
+    return trends_data[list(schema)]
+
+def memory_report(frame):
+    """Return the bytes a DataFrame uses, in total and per column (strings included)"""
+    usage = frame.memory_usage(deep=True, index=False)
+    return {'bytes': int(usage.sum()), 'columns': {column: int(size) for column, size in usage.items()}}
+
+def load_bid_table(path, key='bid_name'):
+    """Return a per-BID metric table indexed by `key` ('bid_name' or 'fy20_name').
+
+    Returns None when the file has not been written yet. Rows without a
+    `key` (e.g. BIDs with no FY20 match) are dropped.
+    """
+    if not os.path.exists(path):
+        return None
+    table = pd.read_csv(path)
+    metric_columns = [column for column in table.columns if column not in BID_NAME_COLUMNS]
+    return table.dropna(subset=[key]).set_index(key)[metric_columns]
+
+def metric_label(column):
+    """Readable label for a metric column, e.g. 'complaints_count' -> 'Complaints count'"""
+    return column.replace('_', ' ').capitalize()
@@ -0,0 +1,223 @@
+import argparse
+import glob
+import json
+import os
+import re
+import pandas as pd
+from hashing import file_hash
+from trends_data import parse_numbers
+
+STORE_DIR = 'BIDs/.trends_store'
+MANIFEST_FILE = 'manifest.json'
+YEAR_COLUMN = 'fiscal_year'
+
+# Normalized column names that differ between report years, mapped to the
+# name used in the store
+COLUMN_ALIASES = {
+    'bid': 'bid_name',
+    'name_of_bid': 'bid_name',
+    'total_expense': 'total_expenses',
+    'service_area_linear_ft': 'service_area_linear_feet',
+}
+
+# A text column is stored as numbers when at least this share of its
+# non-empty values parse as numbers; the rest (free-text answers such as
+# "I don't know") become missing
+NUMERIC_SHARE = 0.8
+
+def normalize_column_name(name):
+    """Return a snake_case column name, e.g. 'Service Area (Linear Feet)' -> 'service_area_linear_feet'"""
+    normalized = re.sub(r'[^0-9a-z]+', '_', name.strip().lower()).strip('_')
+    return COLUMN_ALIASES.get(normalized, normalized)
+
+def column_labels(columns):
+    """Map each normalized column name to the first original label it came from"""
+    labels = {}
+    for column in columns:
+        labels.setdefault(normalize_column_name(column), column)
+    return labels
+
+def fiscal_year(path):
+    """Return the fiscal year of a Trends Report CSV from its 'FYyy' file name prefix"""
+    match = re.search(r'FY(\d{2}|\d{4})_', os.path.basename(path))
+    if not match:
+        raise ValueError(f"Cannot tell the fiscal year of {path}; pass it explicitly")
+    year = int(match.group(1))
+    return year if year > 100 else 2000 + year
+
+def normalize_trends_data(trends_data):
+    """Give a raw Trends Report table normalized column names and typed columns.
+
+    Numeric columns become nullable integers or floats, true/false columns
+    become booleans and the remaining text columns become strings. Raises
+    ValueError when several columns have the same normalized name.
+    """
+    normalized = pd.Series([normalize_column_name(column) for column in trends_data.columns])
+    colliding = normalized[normalized.duplicated(keep=False)]
+    if len(colliding):
+        groups = [' / '.join(repr(trends_data.columns[i]) for i in group.index)
+                  for _, group in colliding.groupby(colliding, sort=False)]
+        raise ValueError(f"Columns with the same normalized name: {'; '.join(groups)}")
+    data = trends_data.rename(columns=normalize_column_name)
+    for column in data.columns:
+        values = data[column]
+        if values.dtype == object:
+            present = values.dropna()
+            lowered = values.astype('string').str.strip().str.lower()
+            if len(present) and lowered.dropna().isin(['true', 'false']).all():
+                data[column] = (lowered == 'true').astype('boolean').mask(lowered.isna())
+                continue
+            numbers = parse_numbers(values)
+            if len(present) and numbers.notna().sum() >= NUMERIC_SHARE * len(present):
+                values = numbers
+            else:
+                data[column] = values.astype('string')
+                continue
+        if values.dtype == bool:
+            data[column] = values.astype('boolean')
+        elif pd.api.types.is_numeric_dtype(values):
+            whole = values.dropna()
+            data[column] = values.astype('Int64' if (whole == whole.round()).all() else 'Float64')
+    return data
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def partition_name(year):
+    """Partition file for a year, relative to the store directory.
+
+    Parquet when pyarrow is installed, otherwise pickled DataFrames (only
+    safe to load from a store you wrote yourself). The name is recorded in
+    the manifest, so a partition is always read in the format it was
+    written in.
+    """
+    extension = 'parquet' if parquet_available() else 'pkl'
+    return os.path.join(f'{YEAR_COLUMN}={year}', f'data.{extension}')
+
+def stored_partition(store_dir, year, entry):
+    """Path of the partition a manifest entry was written to"""
+    if 'partition' in entry:
+        return os.path.join(store_dir, entry['partition'])
+    # Manifests from before the partition was recorded: use the file that exists
+    for extension in ['parquet', 'pkl']:
+        path = os.path.join(store_dir, f'{YEAR_COLUMN}={year}', f'data.{extension}')
+        if os.path.exists(path):
+            return path
+    return None
+
+def load_manifest(store_dir=STORE_DIR):
+    path = os.path.join(store_dir, MANIFEST_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+def ingest(paths, store_dir=STORE_DIR, year=None, force=False):
+    """Add Trends Report CSVs to the store, one partition per fiscal year.
+
+    A CSV is only parsed again when its contents changed since it was
+    ingested. `year` overrides the year in the file name and can only be
+    given for a single CSV. Returns the years that were (re)written.
+    """
+    if year is not None and len(paths) > 1:
+        raise ValueError("A fiscal year can only be given for a single CSV")
+    manifest = load_manifest(store_dir)
+    written = []
+    for path in paths:
+        path_year = year or fiscal_year(path)
+        digest = file_hash(path)
+        entry = manifest.get(str(path_year))
+        stored = entry and stored_partition(store_dir, path_year, entry)
+        if not force and entry and entry['hash'] == digest and stored and os.path.exists(stored):
+            continue
+
+        raw = pd.read_csv(path)
+        data = normalize_trends_data(raw)
+        data.insert(0, YEAR_COLUMN, path_year)
+
+        partition = partition_name(path_year)
+        target = os.path.join(store_dir, partition)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_target = target + '.tmp'
+        if target.endswith('.parquet'):
+            data.to_parquet(temp_target, index=False)
+        else:
+            data.to_pickle(temp_target)
+        os.replace(temp_target, target)
+        # A partition written earlier in the other format is now stale
+        if stored and stored != target and os.path.exists(stored):
+            os.remove(stored)
+
+        manifest[str(path_year)] = {
+            'source': path,
+            'hash': digest,
+            'partition': partition,
+            'rows': len(data),
+            'columns': {column: str(dtype) for column, dtype in data.dtypes.items()},
+            'labels': column_labels(raw.columns),
+        }
+        written.append(path_year)
+
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return written
+
+def load_years(years=None, columns=None, store_dir=STORE_DIR):
+    """Read the stored Trends Reports for `years` (default all) as one DataFrame.
+
+    `years` is a list of years or a (first, last) range, inclusive. Only the
+    requested `columns` are read from Parquet partitions; pickled ones are
+    read whole and then narrowed. Columns a year does not have come back as
+    missing values.
+    """
+    manifest = load_manifest(store_dir)
+    stored_years = sorted(int(stored_year) for stored_year in manifest)
+    if years is None:
+        selected = stored_years
+    elif isinstance(years, tuple):
+        selected = [stored_year for stored_year in stored_years if years[0] <= stored_year <= years[1]]
+    else:
+        selected = [stored_year for stored_year in stored_years if stored_year in set(years)]
+
+    frames = []
+    for selected_year in selected:
+        entry = manifest[str(selected_year)]
+        target = stored_partition(store_dir, selected_year, entry)
+        if target.endswith('.parquet'):
+            available = [YEAR_COLUMN] + list(entry['labels'])
+            wanted = None if columns is None else [c for c in [YEAR_COLUMN, *columns] if c in available]
+            frame = pd.read_parquet(target, columns=wanted)
+        else:
+            frame = pd.read_pickle(target)
+        if columns is not None:
+            frame = frame.reindex(columns=[YEAR_COLUMN, *columns])
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=[YEAR_COLUMN, *(columns or [])])
+    return pd.concat(frames, ignore_index=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Load BID Trends Report CSVs into a typed store partitioned by fiscal year')
+    parser.add_argument('paths', nargs='*', help='Trends Report CSVs (default: BIDs/FY*_BID_Trends_Report_Data_*.csv)')
+    parser.add_argument('--year', type=int, help='Fiscal year, when it is not in the file name')
+    parser.add_argument('--store', default=STORE_DIR, help='Store directory')
+    parser.add_argument('--force', action='store_true', help='Rewrite partitions even if their CSV is unchanged')
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob('BIDs/FY*_BID_Trends_Report_Data_*.csv'))
+    if args.year is not None and len(paths) != 1:
+        parser.error('--year needs exactly one CSV')
+    written = ingest(paths, args.store, year=args.year, force=args.force)
+    manifest = load_manifest(args.store)
+    for stored_year, entry in sorted(manifest.items()):
+        status = 'written' if int(stored_year) in written else 'unchanged'
+        print(f"  {stored_year}  {entry['rows']:>4} rows  {len(entry['columns']):>3} columns  {status:<9} {entry['source']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+from trends_data import parse_numbers, NUMBER
+
+# Lon/lat box around New York City; boundaries outside it are in the wrong CRS
+NYC_BOUNDS = (-74.3, 40.45, -73.65, 40.95)
+
+# Largest allowed difference between the expense categories and the total, in dollars
+EXPENSE_TOLERANCE = 10
+
+# Problems of one kind listed before the rest are summarized
+MAX_EXAMPLES = 5
+
+def describe(check, source, items):
+    """One problem line: what failed, where, and the first few offending items"""
+    items = [str(item) for item in items]
+    listed = ', '.join(items[:MAX_EXAMPLES]) + (f' and {len(items) - MAX_EXAMPLES} more' if len(items) > MAX_EXAMPLES else '')
+    return f"{source}: {check} ({len(items)}): {listed}"
+
+def check_columns(header, columns, source):
+    missing = [column for column in columns if column not in header]
+    return [describe('missing columns', source, missing)] if missing else []
+
+def check_duplicates(names, source):
+    duplicated = pd.unique(names[names.duplicated()].dropna())
+    return [describe('duplicate names', source, duplicated)] if len(duplicated) else []
+
+def check_numbers(raw, columns, source, row_names):
+    """Flag values that are present but do not parse as numbers"""
+    problems = []
+    for column in columns:
+        text = raw[column].str.strip()
+        failed = text.notna() & (text != '') & parse_numbers(text).isna()
+        if failed.any():
+            problems.append(describe(f"values in '{column}' that are not numbers", source,
+                                     [f'{name}={value!r}' for name, value in zip(row_names[failed], text[failed])]))
+    return problems
+
+def validate_trends_csv(path, schema, expense_columns=(), total_column=None, name_column='BID Name:'):
+    """Check a Trends Report CSV against a load_trends_data schema in one pass over its columns.
+
+    Checks that every schema column is present, that number columns parse,
+    that BID names are unique and, when `expense_columns` and
+    `total_column` are given, that the expenses add up to the total within
+    EXPENSE_TOLERANCE. Returns a list of problem descriptions.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    problems = check_columns(header, schema, path)
+    if problems:
+        return problems
+
+    raw = pd.read_csv(path, usecols=list(schema), dtype=str)
+    names = raw[name_column]
+    problems += check_duplicates(names, path)
+    number_columns = [column for column, kind in schema.items() if kind == NUMBER]
+    problems += check_numbers(raw, number_columns, path, names)
+
+    if expense_columns and total_column:
+        expenses = pd.DataFrame({column: parse_numbers(raw[column]) for column in expense_columns})
+        difference = expenses.sum(axis=1) - parse_numbers(raw[total_column])
+        mismatched = difference.abs() > EXPENSE_TOLERANCE
+        if mismatched.any():
+            problems.append(describe(
+                f"expense categories that differ from '{total_column}' by more than ${EXPENSE_TOLERANCE}", path,
+                [f'{name} (${value:,.2f})' for name, value in zip(names[mismatched], difference[mismatched])]
+            ))
+    return problems
+
+def validate_boundaries(path, name_column='F_ALL_BI_2', year_column='Year_Found', geometry_column='the_geom',
+                        cache_dir=None):
+    """Check a boundary CSV's names, founding years and WKT geometries.
+
+    Flags missing columns, duplicate or missing names, founding years that
+    are not numbers, and geometries that cannot be parsed or are missing,
+    empty, invalid or outside NYC_BOUNDS (e.g. projected coordinates or
+    swapped lat/lon). The geometries are parsed with load_geometries, so
+    they are cached for the build that follows. Returns a list of problem
+    descriptions.
+    """
+    import shapely
+    from bid_geometry import load_geometries, CACHE_DIR
+
+    header = pd.read_csv(path, nrows=0).columns
+    problems = check_columns(header, [name_column, year_column, geometry_column], path)
+    if problems:
+        return problems
+
+    bids_data = pd.read_csv(path, usecols=[name_column, year_column], dtype=str)
+    names = bids_data[name_column]
+    if names.isna().any():
+        problems.append(describe('rows without a name', path, list(np.flatnonzero(names.isna()) + 1)))
+    problems += check_duplicates(names, path)
+    labels = names.fillna('(row ' + pd.Series(np.arange(1, len(names) + 1), index=names.index).astype(str) + ')')
+
+    years = pd.to_numeric(bids_data[year_column], errors='coerce')
+    if years.isna().any():
+        problems.append(describe(f"'{year_column}' values that are not years", path, labels[years.isna()]))
+
+    try:
+        geometries = np.asarray(load_geometries(path, geometry_column, cache_dir or CACHE_DIR), dtype=object)
+        missing = pd.isna(geometries)
+    except (TypeError, shapely.errors.GEOSException):
+        # Empty or malformed WKT: parse what can be parsed to find the culprits
+        wkt = pd.read_csv(path, usecols=[geometry_column], dtype=str)[geometry_column]
+        geometries = shapely.from_wkt(wkt.astype(object).where(wkt.notna(), None).values, on_invalid='ignore')
+        missing = wkt.isna().values
+        unparsed = pd.isna(geometries) & ~missing
+        if unparsed.any():
+            problems.append(describe('geometries whose WKT cannot be parsed', path, labels[unparsed]))
+        geometries = np.where(unparsed, None, geometries)
+    empty = ~pd.isna(geometries) & shapely.is_empty(geometries)
+    present = ~pd.isna(geometries) & ~empty
+    invalid = present & ~shapely.is_valid(geometries)
+    bounds = shapely.bounds(geometries)
+    outside = present & ~(
+        (bounds[:, 0] >= NYC_BOUNDS[0]) & (bounds[:, 1] >= NYC_BOUNDS[1])
+        & (bounds[:, 2] <= NYC_BOUNDS[2]) & (bounds[:, 3] <= NYC_BOUNDS[3])
+    )
+    for check, mask in [('missing geometries', missing), ('empty geometries', empty),
+                        ('geometries outside NYC in lon/lat (wrong CRS?)', outside)]:
+        if mask.any():
+            problems.append(describe(check, path, labels[mask]))
+    if invalid.any():
+        reasons = shapely.is_valid_reason(geometries[invalid])
+        problems.append(describe('invalid geometries', path,
+                                 [f'{label} ({reason})' for label, reason in zip(labels[invalid], reasons)]))
+    return problems
+
+def validate_directory(path, columns=('org_id',)):
+    """Check that a BID Directory CSV has `columns` and a unique numeric org_id per entry"""
+    header = pd.read_csv(path, nrows=0).columns
+    problems = check_columns(header, ['org_id', *columns], path)
+    if problems:
+        return problems
+    org_id = pd.read_csv(path, usecols=['org_id'], dtype=str)['org_id']
+    org_ids = pd.to_numeric(org_id, errors='coerce')
+    if org_ids.isna().any():
+        problems.append(describe('org_id values that are not numbers', path, org_id[org_ids.isna()]))
+    duplicated = pd.unique(org_ids[org_ids.duplicated()].dropna())
+    if len(duplicated):
+        problems.append(describe('duplicate org_id values', path, duplicated.astype(int)))
+    return problems
+
+def stop_on_problems(problems, report=None, report_path=None):
+    """Print every problem and exit with an error if there are any.
+
+    With a RunReport the problems are recorded and the report is saved
+    first, so a failed build still leaves a report behind.
+    """
+    if report is not None:
+        report.record('validation_problems', problems)
+    if not problems:
+        return
+    print("\nInput validation failed:")
+    for problem in problems:
+        print(f"  - {problem}")
+    if report is not None:
+        report.save(report_path)
+    raise SystemExit(f"{len(problems)} validation problem(s); nothing was built")
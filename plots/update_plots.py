@@ -1,5 +1,15 @@
+import argparse
 import os
-import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
+PLOTS_DIR = 'plots'
+RESPONSIVE_DIV_ID = 'plotly-div'
+SKIPPED_FILES = ['index.html', 'template.html', 'viewer.html']
+
+# Files are fed to the parser in chunks of this many characters
+CHUNK_SIZE = 64 * 1024
 
 RESPONSIVE_HEADER = '''<!DOCTYPE html>
 <html>
@@ -27,37 +37,156 @@ RESPONSIVE_FOOTER = '''    </div>
 </body>
 </html>'''
 
+class PlotExtractor(HTMLParser):
+    """Stream the plot container and the page scripts out of a plot file.
+
+    The plot container is the first <div> whose only attribute is an id; its
+    contents, including the figure's own Plotly.newPlot script, are passed
+    to `write` as they are parsed, so the figure is never held in memory.
+    `plot_id` is the container's id. The page scripts are the inline
+    <script>s outside the container (e.g. the resize handler); they are
+    collected in `scripts`. Scripts loaded with src are dropped, as the new
+    page loads Plotly itself.
+    """
+
+    def __init__(self, write):
+        super().__init__(convert_charrefs=False)
+        self.write = write
+        self.plot_found = False
+        self.plot_id = None
+        self.scripts = []
+        self.script_parts = None
+        self.div_depth = 0
+        self.in_plot = False
+        self.in_script = False
+
+    @property
+    def script_found(self):
+        return bool(self.scripts)
+
+    def emit(self, text):
+        if self.in_script:
+            self.script_parts.append(text)
+        elif self.in_plot:
+            self.write(text)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'script' and not self.in_plot:
+            self.script_parts = []
+            self.in_script = True
+            return
+        if tag == 'div' and not self.plot_found and len(attrs) == 1 and attrs[0][0] == 'id':
+            self.plot_found = True
+            self.plot_id = attrs[0][1]
+            self.in_plot = True
+            self.div_depth = 1
+            return
+        if tag == 'div' and self.in_plot:
+            self.div_depth += 1
+        self.emit(self.get_starttag_text())
+
+    def handle_startendtag(self, tag, attrs):
+        self.emit(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if tag == 'script' and self.in_script:
+            self.in_script = False
+            script = ''.join(self.script_parts)
+            if script.strip():
+                self.scripts.append(script)
+            return
+        if tag == 'div' and self.in_plot:
+            self.div_depth -= 1
+            if self.div_depth == 0:
+                self.in_plot = False
+                return
+        self.emit(f'</{tag}>')
+
+    def handle_data(self, data):
+        self.emit(data)
+
+    def handle_entityref(self, name):
+        self.emit(f'&{name};')
+
+    def handle_charref(self, name):
+        self.emit(f'&#{name};')
+
+    def handle_comment(self, data):
+        self.emit(f'<!--{data}-->')
+
+    def handle_decl(self, decl):
+        self.emit(f'<!{decl}>')
+
+    def handle_pi(self, data):
+        self.emit(f'<?{data}>')
+
+    def unknown_decl(self, data):
+        self.emit(f'<![{data}]>')
+
 def update_plot_file(filename):
-    if not filename.endswith('.html') or filename in ['index.html', 'template.html']:
-        return
-        
-    filepath = os.path.join('plots', filename)
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Extract the plot data and script
-    plot_match = re.search(r'<div id="[^"]*">(.*?)</div>\s*<script>', content, re.DOTALL)
-    script_match = re.search(r'<script>(.*?)</script>', content, re.DOTALL)
-    
-    if plot_match and script_match:
-        plot_data = plot_match.group(1)
-        script_content = script_match.group(1)
-        
-        # Create new responsive version
-        new_content = f"{RESPONSIVE_HEADER}\n{plot_data}\n    <script>\n{script_content}\n    </script>\n{RESPONSIVE_FOOTER}"
-        
-        # Write to temp file first
-        temp_filepath = os.path.join('plots', 'temp', filename)
-        with open(temp_filepath, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        
-        # Replace original with temp file
-        os.replace(temp_filepath, filepath)
+    """Rewrite one plot file with the responsive layout.
+
+    Returns 'rewritten' or the reason the file was skipped. The new page is
+    written to a temporary file next to the original and moved into place
+    only once the whole file has been parsed.
+    """
+    if not filename.endswith('.html') or filename in SKIPPED_FILES:
+        return 'skipped (not a plot)'
+
+    filepath = os.path.join(PLOTS_DIR, filename)
+    fd, temp_filepath = tempfile.mkstemp(dir=PLOTS_DIR, prefix=f'.{filename}.', suffix='.tmp')
+    try:
+        with open(filepath, 'r', encoding='utf-8') as source, \
+                os.fdopen(fd, 'w', encoding='utf-8') as target:
+            target.write(f"{RESPONSIVE_HEADER}\n")
+            parser = PlotExtractor(target.write)
+            while parser.plot_id != RESPONSIVE_DIV_ID:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+            parser.close()
+
+            # Pages that already have the responsive layout are left alone
+            if parser.plot_id == RESPONSIVE_DIV_ID:
+                status = 'skipped (already responsive)'
+            elif not (parser.plot_found and parser.script_found):
+                status = 'skipped (no plot div and script found)'
+            else:
+                status = 'rewritten'
+                for script_content in parser.scripts:
+                    target.write(f"\n    <script>\n{script_content}\n    </script>")
+                target.write(f"\n{RESPONSIVE_FOOTER}")
+
+        if status == 'rewritten':
+            os.replace(temp_filepath, filepath)
+        else:
+            os.remove(temp_filepath)
+        return status
+    except BaseException:
+        if os.path.exists(temp_filepath):
+            os.remove(temp_filepath)
+        raise
 
 def main():
-    # Update all plot files
-    for filename in os.listdir('plots'):
-        update_plot_file(filename)
+    parser = argparse.ArgumentParser(description='Rewrite the plot pages in plots/ with a responsive layout')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Rewrite files in this many worker processes (0 = one per CPU, 1 = no pool)')
+    args = parser.parse_args()
+
+    filenames = sorted(os.listdir(PLOTS_DIR))
+    if args.jobs == 1:
+        results = [update_plot_file(filename) for filename in filenames]
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs or None) as pool:
+            results = list(pool.map(update_plot_file, filenames))
+
+    counts = {}
+    for filename, result in zip(filenames, results):
+        print(f"  {result:<10} {filename}")
+        status = result.split(' ')[0]
+        counts[status] = counts.get(status, 0) + 1
+    print(', '.join(f"{count} {status}" for status, count in sorted(counts.items())))
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()